@@ -1,20 +1,44 @@
 #!/usr/bin/env python3
 import sqlite3
 import functools
-from datetime import datetime
+import time
+
+from query_log import default_logger, row_count
 
 # Decorator to log SQL queries
 
 
-def log_queries():
+def log_queries(logger=None):
+    """Log each query's text, params fingerprint, duration and row count
+
+    Records are queued to the logger's background writer (the QUERY_LOG_*
+    configured default_logger unless one is given); a disabled logger costs
+    one attribute check per call. Queries that raise are logged with their
+    error whatever the sample rate.
+    """
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            # Extract the SQL query from positional or keyword arguments
-            query = args[0] if args else kwargs.get('query', '')
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            print(f"[{timestamp}] [LOG] Executing SQL query: {query}")
-            return func(*args, **kwargs)
+            active = logger or default_logger
+            if not active.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            result = error = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                duration_ms = (time.perf_counter() - start) * 1000
+                # Failed queries are always kept, like slow ones
+                if error is not None or active.wants(duration_ms):
+                    # Extract the SQL query from positional or keyword arguments
+                    query = args[0] if args else kwargs.get('query', '')
+                    params = args[1] if len(args) > 1 else kwargs.get('params')
+                    active.submit(query, params, duration_ms,
+                                  row_count(result), error)
         return wrapper
     return decorator
 
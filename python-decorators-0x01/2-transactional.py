@@ -1,19 +1,17 @@
 #!/usr/bin/env python3
-import sqlite3
 import functools
 
+import db_pool
+
 # Reuse from previous task
 
 
 def with_db_connection(func):
-    """Decorator to open and close a SQLite DB connection"""
+    """Decorator to check a SQLite connection out of the shared pool"""
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
+        with db_pool.connection() as conn:
             return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
     return wrapper
 
 # New: Transaction management decorator
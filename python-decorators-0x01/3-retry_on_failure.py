@@ -1,20 +1,18 @@
 #!/usr/bin/env python3
 import time
-import sqlite3
 import functools
 
+import db_pool
+
 # Decorator to handle DB connection
 
 
 def with_db_connection(func):
-    """Decorator to open and close a SQLite DB connection"""
+    """Decorator to check a SQLite connection out of the shared pool"""
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
+        with db_pool.connection() as conn:
             return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
     return wrapper
 
 # Decorator to retry DB operations on failure
@@ -1,22 +1,20 @@
 #!/usr/bin/env python3
 import time
-import sqlite3
 import functools
 
+import db_pool
+
 query_cache = {}
 
 # Decorator to handle DB connection
 
 
 def with_db_connection(func):
-    """Decorator to open and close a SQLite DB connection"""
+    """Decorator to check a SQLite connection out of the shared pool"""
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        conn = sqlite3.connect('users.db')
-        try:
+        with db_pool.connection() as conn:
             return func(conn, *args, **kwargs)
-        finally:
-            conn.close()
     return wrapper
 
 # Decorator to cache results of SQL queries
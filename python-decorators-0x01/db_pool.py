@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+import os
+import queue
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Shared SQLite connection pool behind with_db_connection. USERS_DB sets the
+# database path and USERS_DB_POOL_SIZE the number of connections
+
+MMAP_SIZE = 256 * 1024 * 1024
+
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of SQLite connections
+
+    Connections are opened lazily up to size and set up once with WAL,
+    synchronous=NORMAL and mmap_size. A checkout waits up to timeout
+    seconds for a free connection, then raises queue.Empty. Once the pool
+    is closed, connections released into it are closed rather than kept.
+    """
+
+    def __init__(self, path='users.db', size=5, timeout=30,
+                 mmap_size=MMAP_SIZE):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.mmap_size = mmap_size
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._opened = 0
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def _connect(self):
+        # check_same_thread=False: a connection is only ever used by the
+        # thread that checked it out, but successive owners differ
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        return conn
+
+    def acquire(self):
+        """Check out an idle connection, opening one if the pool has room"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            grow = self._opened < self.size
+            if grow:
+                self._opened += 1
+        if grow:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        return self._idle.get(timeout=self.timeout)
+
+    def release(self, conn):
+        """Return a connection, rolling back anything left uncommitted"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self.discard(conn)
+            return
+        # Checked under the lock close() takes, so a connection is either
+        # queued before close() drains the queue or closed here
+        with self._lock:
+            if not self.closed:
+                self._idle.put_nowait(conn)
+                return
+        self.discard(conn)
+
+    def discard(self, conn):
+        """Close a connection instead of returning it to the pool"""
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._opened -= 1
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every idle connection, and each busy one when it is released"""
+        with self._lock:
+            self.closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self.discard(conn)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide pool, created on first use from the environment"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    path=os.environ.get('USERS_DB', 'users.db'),
+                    size=int(os.environ.get('USERS_DB_POOL_SIZE', '5')),
+                )
+    return _pool
+
+
+def configure(path='users.db', size=5, **options):
+    """Replace the shared pool, e.g. to point it at another database"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(path, size, **options)
+    return _pool
+
+
+def connection():
+    """Check a connection out of the shared pool for a with block"""
+    return get_pool().connection()
+
+
+def benchmark(calls=20000, rows=1000):
+    """Per-call time of connect-per-call versus pooled connections"""
+    query = "SELECT * FROM users WHERE id = ?"
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        conn = sqlite3.connect(path)
+        conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, '
+                     'name TEXT NOT NULL, email TEXT NOT NULL UNIQUE)')
+        conn.executemany('INSERT INTO users (name, email) VALUES (?, ?)',
+                         [(f'user {i}', f'user{i}@example.com')
+                          for i in range(rows)])
+        conn.commit()
+        conn.close()
+
+        start = time.perf_counter()
+        for i in range(calls):
+            conn = sqlite3.connect(path)
+            try:
+                conn.execute(query, (i % rows + 1,)).fetchone()
+            finally:
+                conn.close()
+        per_call = (time.perf_counter() - start) / calls
+
+        pool = ConnectionPool(path, size=1)
+        start = time.perf_counter()
+        for i in range(calls):
+            with pool.connection() as conn:
+                conn.execute(query, (i % rows + 1,)).fetchone()
+        pooled = (time.perf_counter() - start) / calls
+        pool.close()
+    return per_call, pooled
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    per_call, pooled = benchmark(calls)
+    print(f"connect per call: {per_call * 1e6:.1f} us/call")
+    print(f"pooled:           {pooled * 1e6:.1f} us/call "
+          f"({per_call / pooled:.1f}x faster)")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+import atexit
+import hashlib
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Structured query records, written by a background thread so the
+# decorated call only pays for a queue put
+
+
+def fingerprint(params):
+    """Short stable hash of query parameters, so values never hit the log"""
+    if params is None:
+        return None
+    return hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+
+
+def format_record(record):
+    """Render a record as the classic [timestamp] [LOG] line"""
+    timestamp = datetime.fromtimestamp(record['time']).strftime(
+        '%Y-%m-%d %H:%M:%S')
+    details = f"{record['duration_ms']:.3f} ms"
+    if record['rows'] is not None:
+        details += f", {record['rows']} rows"
+    if record['params'] is not None:
+        details += f", params {record['params']}"
+    if record['slow']:
+        details += ", SLOW"
+    if record['error'] is not None:
+        details += f", FAILED: {record['error']}"
+    return f"[{timestamp}] [LOG] Executing SQL query: {record['query']} ({details})"
+
+
+def stream_sink(stream=None):
+    """Sink that writes formatted records to a text stream (stdout by default)"""
+    def write(record):
+        print(format_record(record), file=stream or sys.stdout, flush=True)
+    return write
+
+
+class QueryLogger:
+    """Queue-backed query logger with sampling and a slow-query threshold
+
+    Queries at or over slow_ms are always logged, as are failed ones (the
+    decorator submits those unconditionally); the rest are logged with
+    probability sample_rate. Records go to sink(record) on a daemon thread.
+    When the queue is full records are dropped and counted, never waited on.
+    """
+
+    def __init__(self, sink=None, sample_rate=1.0, slow_ms=None,
+                 max_queue=10000, enabled=True):
+        self.sink = sink or stream_sink()
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.enabled = enabled
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def wants(self, duration_ms):
+        """Whether a query that took duration_ms should be recorded"""
+        if self.slow_ms is not None and duration_ms >= self.slow_ms:
+            return True
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def submit(self, query, params, duration_ms, rows, error=None):
+        """Queue a raw record; fingerprinting and formatting happen later"""
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(
+                (time.time(), query, params, duration_ms, rows, error))
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='query-log', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                logged_at, query, params, duration_ms, rows, error = item
+                self.sink({
+                    'time': logged_at,
+                    'query': query,
+                    'params': fingerprint(params),
+                    'duration_ms': duration_ms,
+                    'rows': rows,
+                    'slow': self.slow_ms is not None and duration_ms >= self.slow_ms,
+                    'error': error,
+                })
+            except Exception as e:
+                print(f"[ERROR] Query log sink failed: {e}", file=sys.stderr)
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued record has reached the sink"""
+        if self._thread is not None:
+            self._queue.join()
+
+
+def _env_logger():
+    # QUERY_LOG=0 disables logging; QUERY_LOG_SAMPLE and QUERY_LOG_SLOW_MS
+    # set the sampling rate and slow-query threshold
+    slow_ms = os.environ.get('QUERY_LOG_SLOW_MS')
+    return QueryLogger(
+        sample_rate=float(os.environ.get('QUERY_LOG_SAMPLE', '1.0')),
+        slow_ms=float(slow_ms) if slow_ms else None,
+        enabled=os.environ.get('QUERY_LOG', '1') != '0',
+    )
+
+
+default_logger = _env_logger()
+
+
+def row_count(result):
+    """Rows in a fetchall()-style result, None for anything else
+
+    A fetchone() row is a tuple of columns, so only lists are counted.
+    """
+    return len(result) if isinstance(result, list) else None
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+import functools
+import inspect
+import re
+import threading
+import time
+
+from query_log import row_count
+
+# Per-query latency histograms, call counts and rows returned, kept in an
+# in-process registry and dumped in the Prometheus text format
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r'\s+')
+
+# Prometheus bucket bounds in seconds
+EXPORT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                  0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def query_fingerprint(query):
+    """Collapse literals and whitespace so one statement shape is one series"""
+    return _SPACES.sub(' ', _LITERALS.sub('?', query)).strip()
+
+
+class LatencyHistogram:
+    """Log-linear microsecond histogram in the style of HdrHistogram
+
+    Values below 2**sub_bits are exact; above that every power of two is
+    split into 2**(sub_bits - 1) equal buckets, so any recorded value is
+    within 1 / 2**(sub_bits - 1) of its bucket bound (about 3% with the
+    default of 6). Buckets are kept sparse.
+    """
+
+    def __init__(self, sub_bits=6):
+        self.sub_bits = sub_bits
+        self.buckets = {}
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def _index(self, value):
+        shift = value.bit_length() - self.sub_bits
+        if shift <= 0:
+            return value
+        return (shift << self.sub_bits) + (value >> shift)
+
+    def _upper(self, index):
+        shift = index >> self.sub_bits
+        if shift == 0:
+            return index
+        mantissa = index & ((1 << self.sub_bits) - 1)
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value_us):
+        value = max(int(value_us), 0)
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total_us += value
+        self.max_us = max(self.max_us, value)
+
+    def merge(self, other):
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction, in µs"""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                return min(self._upper(index), self.max_us)
+        return self.max_us
+
+    def cumulative(self, bounds_us):
+        """Counts at or below each bound, for Prometheus le buckets"""
+        counts = [0] * len(bounds_us)
+        for index, count in self.buckets.items():
+            upper = self._upper(index)
+            for position, bound in enumerate(bounds_us):
+                if upper <= bound:
+                    counts[position] += count
+        return counts
+
+
+class QueryStats:
+    """Latency, call and row totals for one query fingerprint"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+
+    def as_dict(self):
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'rows': self.rows,
+            'total_ms': self.latency.total_us / 1000,
+            'p50_ms': _ms(self.latency.percentile(0.5)),
+            'p95_ms': _ms(self.latency.percentile(0.95)),
+            'p99_ms': _ms(self.latency.percentile(0.99)),
+            'max_ms': self.latency.max_us / 1000,
+        }
+
+
+def _ms(value_us):
+    return None if value_us is None else value_us / 1000
+
+
+class MetricsRegistry:
+    """Thread-safe map of query fingerprint -> QueryStats"""
+
+    def __init__(self):
+        self.queries = {}
+        self._lock = threading.Lock()
+
+    def record(self, query, duration_us, rows=None, failed=False):
+        key = query_fingerprint(query)
+        with self._lock:
+            stats = self.queries.get(key)
+            if stats is None:
+                stats = self.queries[key] = QueryStats()
+            stats.latency.record(duration_us)
+            stats.calls += 1
+            if failed:
+                stats.errors += 1
+            if rows is not None:
+                stats.rows += rows
+
+    def hot_queries(self, limit=10):
+        """Fingerprints ordered by total time spent, slowest first"""
+        with self._lock:
+            report = [(query, stats.as_dict())
+                      for query, stats in self.queries.items()]
+        report.sort(key=lambda item: item[1]['total_ms'], reverse=True)
+        return report[:limit]
+
+    def reset(self):
+        with self._lock:
+            self.queries.clear()
+
+    def prometheus(self):
+        """Dump every series in the Prometheus text exposition format"""
+        bounds_us = [bound * 1000000 for bound in EXPORT_BUCKETS]
+        latency = ['# HELP db_query_duration_seconds Query execution time',
+                   '# TYPE db_query_duration_seconds histogram']
+        calls = ['# HELP db_query_calls_total Query executions',
+                 '# TYPE db_query_calls_total counter']
+        errors = ['# HELP db_query_errors_total Query executions that raised',
+                  '# TYPE db_query_errors_total counter']
+        rows = ['# HELP db_query_rows_total Rows returned by queries',
+                '# TYPE db_query_rows_total counter']
+        with self._lock:
+            for query, stats in sorted(self.queries.items()):
+                label = f'query="{_escape(query)}"'
+                counts = stats.latency.cumulative(bounds_us)
+                for bound, count in zip(EXPORT_BUCKETS, counts):
+                    latency.append(
+                        f'db_query_duration_seconds_bucket{{{label},le="{bound}"}} {count}')
+                latency.append(
+                    f'db_query_duration_seconds_bucket{{{label},le="+Inf"}} {stats.latency.count}')
+                latency.append(
+                    f'db_query_duration_seconds_sum{{{label}}} {stats.latency.total_us / 1000000}')
+                latency.append(
+                    f'db_query_duration_seconds_count{{{label}}} {stats.latency.count}')
+                calls.append(f'db_query_calls_total{{{label}}} {stats.calls}')
+                errors.append(f'db_query_errors_total{{{label}}} {stats.errors}')
+                rows.append(f'db_query_rows_total{{{label}}} {stats.rows}')
+        return '\n'.join(latency + calls + errors + rows) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+def _query_position(func):
+    # Index of a parameter literally named query, so the SQL can be found
+    # whether it is passed by keyword or by position (after conn, under
+    # with_db_connection). Other arguments are never used as the key: they
+    # may be user data such as an email address. The signature is func's
+    # own, not the one behind __wrapped__: over with_db_connection that
+    # one counts a conn the caller never passes, so the positions are off
+    # by one; the (*args, **kwargs) wrapper has no query position at all
+    try:
+        parameters = list(inspect.signature(func, follow_wrapped=False).parameters)
+    except (TypeError, ValueError):
+        return None
+    return parameters.index('query') if 'query' in parameters else None
+
+
+def instrument(target=None, name=None):
+    """Time each call and record it in the registry under its query fingerprint
+
+    The key is name when given, else the function's query argument, else
+    the function's qualified name. Above with_db_connection only a query=
+    keyword is seen; below it the query may also be passed by position.
+    """
+    def decorator(func):
+        position = _query_position(func)
+
+        def series(args, kwargs):
+            if name is not None:
+                return name
+            query = kwargs.get('query')
+            if query is None and position is not None and position < len(args):
+                query = args[position]
+            return query if isinstance(query, str) else func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            active = target or registry
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                elapsed = (time.perf_counter() - start) * 1000000
+                active.record(series(args, kwargs), elapsed, failed=True)
+                raise
+            elapsed = (time.perf_counter() - start) * 1000000
+            active.record(series(args, kwargs), elapsed, row_count(result))
+            return result
+        return wrapper
+    return decorator
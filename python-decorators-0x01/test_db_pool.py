@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""unit test module for db_pool
+"""
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+import db_pool
+from db_pool import ConnectionPool
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Tests `ConnectionPool`."""
+
+    def setUp(self) -> None:
+        """Creates a scratch database with a users table."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'users.db')
+        conn = sqlite3.connect(self.path)
+        conn.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)')
+        conn.commit()
+        conn.close()
+
+    def make_pool(self, size: int = 2, **options) -> ConnectionPool:
+        """Returns a pool that is closed after the test."""
+        pool = ConnectionPool(self.path, size, **options)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_pragmas(self) -> None:
+        """Tests WAL, synchronous=NORMAL and mmap_size are set."""
+        pool = self.make_pool(mmap_size=1 << 20)
+        with pool.connection() as conn:
+            self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone(),
+                             ('wal',))
+            self.assertEqual(conn.execute('PRAGMA synchronous').fetchone(),
+                             (1,))
+            self.assertEqual(conn.execute('PRAGMA mmap_size').fetchone(),
+                             (1 << 20,))
+
+    def test_connection_reused(self) -> None:
+        """Tests a returned connection is handed out again."""
+        pool = self.make_pool()
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            self.assertIs(first, second)
+
+    def test_uncommitted_work_rolled_back(self) -> None:
+        """Tests release discards what the caller did not commit."""
+        pool = self.make_pool(size=1)
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO users (name) VALUES ('a')")
+        with pool.connection() as conn:
+            self.assertFalse(conn.in_transaction)
+            self.assertEqual(
+                conn.execute('SELECT COUNT(*) FROM users').fetchone(), (0,))
+
+    def test_bounded(self) -> None:
+        """Tests checkout waits, then raises, once size are out."""
+        pool = self.make_pool(size=1, timeout=0.05)
+        conn = pool.acquire()
+        with self.assertRaises(queue.Empty):
+            pool.acquire()
+        pool.release(conn)
+        pool.release(pool.acquire())
+
+    def test_threads_share_size_connections(self) -> None:
+        """Tests concurrent checkouts never open more than size."""
+        pool = self.make_pool(size=3)
+        errors = []
+
+        def work():
+            try:
+                for _ in range(50):
+                    with pool.connection() as conn:
+                        conn.execute('SELECT * FROM users').fetchall()
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(pool._opened, 3)
+        self.assertEqual(pool._idle.qsize(), pool._opened)
+
+    def test_discard(self) -> None:
+        """Tests a discarded connection frees its slot."""
+        pool = self.make_pool(size=1, timeout=0.05)
+        pool.discard(pool.acquire())
+        pool.release(pool.acquire())
+
+    def test_configure(self) -> None:
+        """Tests the shared pool can be pointed at another database."""
+        self.addCleanup(setattr, db_pool, '_pool', db_pool._pool)
+        pool = db_pool.configure(self.path, size=1)
+        self.addCleanup(pool.close)
+        self.assertIs(db_pool.get_pool(), pool)
+        with db_pool.connection() as conn:
+            self.assertEqual(
+                conn.execute('SELECT COUNT(*) FROM users').fetchone(), (0,))
+
+
+    def test_configure_closes_busy_connections(self) -> None:
+        """Tests a connection checked out of a replaced pool is closed on release."""
+        self.addCleanup(setattr, db_pool, '_pool', db_pool._pool)
+        old = db_pool.configure(self.path, size=2)
+        idle = old.acquire()
+        old.release(idle)
+        with db_pool.connection() as busy:
+            new = db_pool.configure(self.path, size=1)
+            self.addCleanup(new.close)
+            self.assertTrue(old.closed)
+            busy.execute('SELECT 1')
+        for conn in (idle, busy):
+            with self.assertRaises(sqlite3.ProgrammingError):
+                conn.execute('SELECT 1')
+        self.assertEqual(old._opened, 0)
+        self.assertEqual(old._idle.qsize(), 0)
+        self.assertIsNot(db_pool.get_pool(), old)
+
+
+if __name__ == '__main__':
+    unittest.main()
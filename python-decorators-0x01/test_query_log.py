@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""unit test module for query_log
+"""
+import contextlib
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import query_log
+from query_log import QueryLogger, fingerprint, format_record, row_count
+
+
+def import_log_queries():
+    """Imports 0-log_queries without its demo touching ./users.db."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory, \
+            patch.object(query_log.default_logger, 'enabled', False), \
+            contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(directory)
+        try:
+            return __import__('0-log_queries')
+        finally:
+            os.chdir(cwd)
+
+
+class TestHelpers(unittest.TestCase):
+    """Tests the record helpers."""
+
+    def test_fingerprint(self) -> None:
+        """Tests params hash stably and never appear verbatim."""
+        params = ("Jane", "jane@example.com")
+        self.assertEqual(fingerprint(params), fingerprint(tuple(params)))
+        self.assertNotEqual(fingerprint(params), fingerprint(("Jane",)))
+        self.assertNotIn("jane", fingerprint(params))
+        self.assertIsNone(fingerprint(None))
+
+    def test_row_count(self) -> None:
+        """Tests only fetchall()-style lists are counted."""
+        self.assertEqual(row_count([(1,), (2,)]), 2)
+        self.assertIsNone(row_count((1, 'a')))
+        self.assertIsNone(row_count(None))
+
+    def test_format_record(self) -> None:
+        """Tests the rendered line carries every field."""
+        line = format_record({
+            'time': 0, 'query': 'SELECT 1', 'params': 'abc',
+            'duration_ms': 1.5, 'rows': 3, 'slow': True, 'error': 'Boom',
+        })
+        self.assertIn("[LOG] Executing SQL query: SELECT 1", line)
+        for part in ("1.500 ms", "3 rows", "params abc", "SLOW",
+                     "FAILED: Boom"):
+            self.assertIn(part, line)
+
+
+class TestQueryLogger(unittest.TestCase):
+    """Tests `QueryLogger`."""
+
+    def test_records_reach_sink(self) -> None:
+        """Tests submitted records are written by the background thread."""
+        records = []
+        logger = QueryLogger(sink=records.append, slow_ms=5)
+        logger.submit("SELECT ?", (1,), 7.0, 1)
+        logger.submit("SELECT 2", None, 1.0, None, "OperationalError: x")
+        logger.flush()
+        self.assertEqual([record['query'] for record in records],
+                         ["SELECT ?", "SELECT 2"])
+        self.assertTrue(records[0]['slow'])
+        self.assertEqual(records[0]['params'], fingerprint((1,)))
+        self.assertEqual(records[1]['error'], "OperationalError: x")
+
+    def test_sampling(self) -> None:
+        """Tests sample_rate and the slow threshold decide what is kept."""
+        logger = QueryLogger(sink=lambda record: None, sample_rate=0.0,
+                             slow_ms=10)
+        self.assertFalse(logger.wants(1.0))
+        self.assertTrue(logger.wants(10.0))
+        self.assertTrue(QueryLogger(sample_rate=1.0).wants(0.0))
+
+    def test_full_queue_drops(self) -> None:
+        """Tests a full queue counts drops instead of blocking."""
+        logger = QueryLogger(sink=lambda record: None, max_queue=1)
+        with patch.object(logger, '_start'):
+            logger.submit("SELECT 1", None, 1.0, None)
+            logger.submit("SELECT 2", None, 1.0, None)
+        self.assertEqual(logger.dropped, 1)
+
+    def test_sink_failure_is_contained(self) -> None:
+        """Tests a failing sink does not stop the writer."""
+        records = []
+
+        def sink(record):
+            if record['query'] == 'bad':
+                raise RuntimeError("sink down")
+            records.append(record)
+        logger = QueryLogger(sink=sink)
+        with patch('sys.stderr'):
+            logger.submit('bad', None, 1.0, None)
+            logger.submit('good', None, 1.0, None)
+            logger.flush()
+        self.assertEqual([record['query'] for record in records], ['good'])
+
+
+class TestLogQueries(unittest.TestCase):
+    """Tests the `log_queries` decorator."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """Imports the decorator module once."""
+        cls.module = import_log_queries()
+
+    def setUp(self) -> None:
+        """Builds a decorated query runner logging to a list."""
+        self.records = []
+        self.logger = QueryLogger(sink=self.records.append, sample_rate=0.0)
+
+        @self.module.log_queries(self.logger)
+        def run(query, params=()):
+            return sqlite3.connect(':memory:').execute(query, params).fetchall()
+        self.run_query = run
+
+    def test_failed_query_always_logged(self) -> None:
+        """Tests a raising query is logged despite a zero sample rate."""
+        self.run_query("SELECT 1")
+        with self.assertRaises(sqlite3.OperationalError):
+            self.run_query("SELECT * FROM missing", (1,))
+        self.logger.flush()
+        self.assertEqual(len(self.records), 1)
+        record = self.records[0]
+        self.assertEqual(record['query'], "SELECT * FROM missing")
+        self.assertTrue(record['error'].startswith("OperationalError"))
+        self.assertEqual(record['params'], fingerprint((1,)))
+        self.assertIsNone(record['rows'])
+
+    def test_sampled_query_has_rows(self) -> None:
+        """Tests a kept query records its duration and row count."""
+        self.logger.sample_rate = 1.0
+        self.assertEqual(self.run_query(query="SELECT 1"), [(1,)])
+        self.logger.flush()
+        self.assertEqual(self.records[0]['rows'], 1)
+        self.assertIsNone(self.records[0]['error'])
+        self.assertGreaterEqual(self.records[0]['duration_ms'], 0)
+
+    def test_disabled_logger_skips(self) -> None:
+        """Tests a disabled logger records nothing."""
+        self.logger.enabled = False
+        self.logger.sample_rate = 1.0
+        self.run_query("SELECT 1")
+        self.logger.flush()
+        self.assertEqual(self.records, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""unit test module for query_metrics
+"""
+import functools
+import random
+import unittest
+
+from parameterized import parameterized
+
+from query_metrics import (
+    LatencyHistogram,
+    MetricsRegistry,
+    instrument,
+    query_fingerprint,
+)
+
+
+class TestQueryFingerprint(unittest.TestCase):
+    """Tests `query_fingerprint`."""
+
+    @parameterized.expand([
+        ("SELECT * FROM users WHERE id = 42", "SELECT * FROM users WHERE id = ?"),
+        ("SELECT  *\n FROM users WHERE email = 'a''b@x'",
+         "SELECT * FROM users WHERE email = ?"),
+        ("SELECT 1.5, ?", "SELECT ?, ?"),
+        ("SELECT * FROM t1", "SELECT * FROM t1"),
+    ])
+    def test_fingerprint(self, query: str, expected: str) -> None:
+        """Tests literals and whitespace collapse."""
+        self.assertEqual(query_fingerprint(query), expected)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Tests `LatencyHistogram`."""
+
+    def test_bucket_bounds(self) -> None:
+        """Tests every value sits in a bucket within ~3% above it."""
+        histogram = LatencyHistogram()
+        previous = -1
+        for value in range(0, 200000, 7):
+            index = histogram._index(value)
+            self.assertGreaterEqual(index, previous)
+            previous = index
+            upper = histogram._upper(index)
+            self.assertGreaterEqual(upper, value)
+            self.assertLessEqual(upper, value * 1.032 + 1)
+
+    def test_small_values_exact(self) -> None:
+        """Tests values below 2**sub_bits get their own bucket."""
+        histogram = LatencyHistogram()
+        for value in range(64):
+            self.assertEqual(histogram._upper(histogram._index(value)), value)
+
+    def test_percentiles(self) -> None:
+        """Tests percentiles land within 3% of the exact ones."""
+        rng = random.Random(3)
+        values = sorted(int(rng.lognormvariate(6, 1.5)) for _ in range(20000))
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+        for fraction in (0.5, 0.95, 0.99):
+            exact = values[int(fraction * len(values)) - 1]
+            estimate = histogram.percentile(fraction)
+            self.assertGreaterEqual(estimate, exact)
+            self.assertLessEqual(estimate, exact * 1.032 + 1)
+        self.assertEqual(histogram.percentile(1.0), values[-1])
+
+    def test_merge(self) -> None:
+        """Tests a merged histogram equals one fed everything."""
+        left, right, whole = (LatencyHistogram() for _ in range(3))
+        for value in range(1000):
+            (left if value % 2 else right).record(value * 13)
+            whole.record(value * 13)
+        merged = left.merge(right)
+        self.assertEqual(merged.buckets, whole.buckets)
+        self.assertEqual((merged.count, merged.total_us, merged.max_us),
+                         (whole.count, whole.total_us, whole.max_us))
+
+    def test_cumulative(self) -> None:
+        """Tests cumulative counts for Prometheus bounds."""
+        histogram = LatencyHistogram()
+        for value in (50, 150, 5000):
+            histogram.record(value)
+        self.assertEqual(histogram.cumulative([100, 1000, 10000]), [1, 2, 3])
+
+
+def with_db_connection(func):
+    """Stand-in for the decorator files' with_db_connection."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func('conn', *args, **kwargs)
+    return wrapper
+
+
+class TestRegistry(unittest.TestCase):
+    """Tests `MetricsRegistry` and `instrument`."""
+
+    def setUp(self) -> None:
+        """Uses a private registry per test."""
+        self.registry = MetricsRegistry()
+
+    def test_instrument_query_argument(self) -> None:
+        """Tests the query parameter is used, by position or keyword."""
+        @instrument(self.registry)
+        def fetch(conn, query):
+            return [1, 2]
+        fetch(None, "SELECT * FROM users WHERE id = 1")
+        fetch(None, query="SELECT * FROM users WHERE id = 2")
+        stats = self.registry.queries["SELECT * FROM users WHERE id = ?"]
+        self.assertEqual((stats.calls, stats.rows), (2, 4))
+
+    def test_instrument_never_keys_on_data(self) -> None:
+        """Tests other string arguments never become series."""
+        @instrument(self.registry)
+        def update_email(conn, user_id, new_email):
+            return None
+        update_email(None, 1, 'person0@example.com')
+        update_email(None, 2, 'person1@example.com')
+        self.assertEqual(list(self.registry.queries),
+                         [update_email.__qualname__])
+
+    def test_instrument_over_with_db_connection(self) -> None:
+        """Tests instrument above with_db_connection never keys on data."""
+        @instrument(self.registry)
+        @with_db_connection
+        def fetch(conn, query, email=None):
+            return []
+        fetch("SELECT * FROM users WHERE id = 1")
+        fetch("SELECT * FROM users WHERE email = ?", "alice@example.com")
+        fetch(query="SELECT * FROM users WHERE id = 2")
+        self.assertEqual(sorted(self.registry.queries),
+                         ["SELECT * FROM users WHERE id = ?",
+                          fetch.__qualname__])
+        self.assertEqual(self.registry.queries[fetch.__qualname__].calls, 2)
+
+    def test_instrument_under_with_db_connection(self) -> None:
+        """Tests instrument below with_db_connection finds the query."""
+        @with_db_connection
+        @instrument(self.registry)
+        def fetch(conn, query, email=None):
+            return []
+        fetch("SELECT * FROM users WHERE email = ?", "alice@example.com")
+        self.assertEqual(list(self.registry.queries),
+                         ["SELECT * FROM users WHERE email = ?"])
+
+    def test_instrument_name(self) -> None:
+        """Tests an explicit name wins."""
+        @instrument(self.registry, name='users.by_id')
+        def get_user(conn, query):
+            return None
+        get_user(None, "SELECT 1")
+        self.assertEqual(list(self.registry.queries), ['users.by_id'])
+
+    def test_instrument_counts_errors(self) -> None:
+        """Tests raising calls are timed and counted as errors."""
+        @instrument(self.registry)
+        def broken(conn, query):
+            raise RuntimeError("boom")
+        with self.assertRaises(RuntimeError):
+            broken(None, "SELECT 1")
+        stats = self.registry.queries["SELECT ?"]
+        self.assertEqual((stats.calls, stats.errors), (1, 1))
+
+    def test_hot_queries(self) -> None:
+        """Tests fingerprints rank by total time."""
+        self.registry.record("SELECT a", 100)
+        self.registry.record("SELECT b", 50)
+        self.registry.record("SELECT b", 80)
+        ranked = [query for query, _ in self.registry.hot_queries()]
+        self.assertEqual(ranked, ["SELECT b", "SELECT a"])
+
+    def test_prometheus(self) -> None:
+        """Tests the text exposition format."""
+        self.registry.record('SELECT "x"\nFROM t', 150, rows=3)
+        self.registry.record('SELECT "x"\nFROM t', 2000, rows=1)
+        text = self.registry.prometheus()
+        label = 'query="SELECT \\"x\\" FROM t"'
+        self.assertIn('# TYPE db_query_duration_seconds histogram', text)
+        self.assertIn(
+            f'db_query_duration_seconds_bucket{{{label},le="0.00025"}} 1',
+            text)
+        self.assertIn(
+            f'db_query_duration_seconds_bucket{{{label},le="+Inf"}} 2', text)
+        self.assertIn(f'db_query_duration_seconds_count{{{label}}} 2', text)
+        self.assertIn(f'db_query_calls_total{{{label}}} 2', text)
+        self.assertIn(f'db_query_rows_total{{{label}}} 4', text)
+        self.assertTrue(text.endswith('\n'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,26 +1,56 @@
 #!/usr/bin/python3
 
 import json
+import sys
+from collections import namedtuple
+from itertools import islice
 
-seed = __import__('seed')
+queries = __import__('queries')
+streams = __import__('streams')
 
-def stream_users():
-    connect = seed.connect_to_prodev()
-    if connect:
-        cursor = connect.cursor()
-        cursor.execute("SELECT * FROM user_data")
+_encoder = json.JSONEncoder(separators=(',', ':'))
+
+class UserRow(namedtuple('UserRow', ['user_id', 'name', 'email', 'age'])):
+    """One user_data row; age is converted from Decimal once, on construction"""
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(row[0], row[1], row[2], float(row[3]))
+
+    def as_dict(self):
+        return self._asdict()
+
+    def as_json(self):
+        return _encoder.encode(self._asdict())
+
+@streams.managed
+def stream_users(connect, prefetch=100):
+    #Prepared cursors read rows off the wire as they are fetched, like an
+    #unbuffered cursor, so memory is bounded by prefetch
+    sql, params = queries.build_select('user_data', UserRow._fields)
+    cursor = queries.execute(connect, sql, params)
+    try:
+        from_row = UserRow.from_row
         while True:
-            row = cursor.fetchone()
-            if row is None:
+            rows = cursor.fetchmany(prefetch)
+            if not rows:
                 break
-            yield "{'user_id'" + ": " + row[0] + ", 'name'" + ": " + row[1] + ", 'email'" + ": " + row[2] + ", 'age'" + ":" + str(float(row[3])) + "}"
+            for row in rows:
+                yield from_row(row)
+    finally:
         cursor.close()
 
 if __name__ == "__main__":
-    connection = seed.connect_to_prodev()
-    if connection:
-        for user in stream_users():
-            json_user = json.dumps(user, default=str, indent=4)
-            print(json_user)
-            
-        connection.close()
\ No newline at end of file
+    if '--ndjson' in sys.argv[1:]:
+        ndjson = __import__('ndjson')
+        with stream_users() as users, ndjson.NDJSONWriter() as writer:
+            while True:
+                batch = list(islice(users, 1000))
+                if not batch:
+                    break
+                writer.write_rows(user.as_dict() for user in batch)
+    else:
+        with stream_users() as users:
+            for user in users:
+                print(user.as_json())
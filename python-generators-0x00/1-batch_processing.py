@@ -2,27 +2,156 @@
 
 import json
 import decimal
+import sys
+import time
 
-seed = __import__('seed')
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-def stream_users_in_batches(batch_size):
-    connection = seed.connect_to_prodev()
-    if connection:
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute('SELECT * FROM user_data')
+queries = __import__('queries')
+streams = __import__('streams')
+
+COLUMNS = ('user_id', 'name', 'email', 'age')
+
+#The document json.dumps(row, indent=2) writes for one user; filled in from
+#columns encoded a whole batch at a time
+ROW_TEMPLATE = '{\n' + ',\n'.join(f'  "{name}": %s' for name in COLUMNS) + '\n}'
+
+def to_columns(batch):
+    #Transposes a batch of row tuples into one NumPy array per column
+    user_ids, names, emails, ages = zip(*batch)
+    return {
+        'user_id': np.array(user_ids),
+        'name': np.array(names),
+        'email': np.array(emails),
+        'age': np.array(ages, dtype=np.float64),
+    }
+
+class AdaptiveBatchSizer:
+    """Picks each fetchmany size from how long the previous fetches took.
+
+    Sizes move toward target_latency seconds per batch and, when max_bytes
+    is set, toward at most max_bytes of row data per batch. Growth is capped
+    at 2x per batch so one fast fetch cannot overshoot. Every fetch is
+    recorded in metrics as (seconds since start, size, rows, latency, bytes).
+    """
+    def __init__(self, initial=100, target_latency=0.05, max_bytes=None,
+                 minimum=10, maximum=100000):
+        self.size = initial
+        self.target_latency = target_latency
+        self.max_bytes = max_bytes
+        self.minimum = minimum
+        self.maximum = maximum
+        self.started = time.monotonic()
+        self.metrics = []
+
+    def record(self, rows, latency, nbytes=None):
+        self.metrics.append((time.monotonic() - self.started, self.size, len(rows), latency, nbytes))
+        if not rows or len(rows) < self.size:
+            return
+        ideal = self.size * self.target_latency / latency if latency > 0 else self.maximum
+        if self.max_bytes and nbytes:
+            ideal = min(ideal, self.max_bytes * len(rows) / nbytes)
+        size = int(min(ideal, self.size * 2))
+        self.size = max(self.minimum, min(self.maximum, size))
+
+    def report(self, out=sys.stderr):
+        for elapsed, size, rows, latency, nbytes in self.metrics:
+            extra = f", {nbytes} bytes" if nbytes is not None else ""
+            print(f"{elapsed:8.3f}s size={size} rows={rows} latency={latency * 1000:.2f}ms{extra}",
+                  file=out)
+
+def row_bytes(batch):
+    #Rough payload size: string lengths plus 8 bytes for anything else
+    total = 0
+    for row in batch:
+        for value in (row.values() if isinstance(row, dict) else row):
+            total += len(value) if isinstance(value, str) else 8
+    return total
+
+@streams.managed
+def stream_users_in_batches(connection, batch_size=None, columnar=False, sizer=None):
+    #With an AdaptiveBatchSizer batch_size is optional and not used: the
+    #first fetch is sizer's initial size and every later one comes from
+    #sizer as well
+    if batch_size is None and sizer is None:
+        raise ValueError("stream_users_in_batches needs a batch_size or a sizer")
+    if columnar and np is None:
+        raise ImportError("columnar batches need numpy (pip install numpy)")
+    sql, params = queries.build_select('user_data', COLUMNS)
+    cursor = queries.execute(connection, sql, params, dictionary=not columnar)
+    try:
         while True:
-            batch = cursor.fetchmany(batch_size)
+            if sizer is None:
+                batch = cursor.fetchmany(batch_size)
+            else:
+                started = time.perf_counter()
+                batch = cursor.fetchmany(sizer.size)
+                latency = time.perf_counter() - started
+                sizer.record(batch, latency, row_bytes(batch) if sizer.max_bytes else None)
             if not batch:
                 return
-            yield batch
+            yield to_columns(batch) if columnar else batch
+    finally:
         cursor.close()
 
-def batch_processing(batch_size):
-    for batch in stream_users_in_batches(batch_size):
-        filtered_user = [
-            {**row, 'age': float(row['age'])}
-            for row in batch
-            if isinstance(row['age'], (int, float, decimal.Decimal)) and float(row['age']) > 25
-        ]
-        for user in filtered_user:
-            print(json.dumps(user, indent=2))
\ No newline at end of file
+def filter_columns(columns, min_age=25):
+    #One vectorised comparison per batch instead of a test per row
+    mask = columns['age'] > min_age
+    return {name: values[mask] for name, values in columns.items()}
+
+def encode_columns(columns):
+    #Same text as json.dumps(row, indent=2) per row, but each column is
+    #encoded in one pass and the rows are joined by a single format per row
+    #rather than a json.dumps call (and its dict) per row
+    encoded = [map(json.encoder.encode_basestring_ascii, columns[name].tolist())
+               for name in COLUMNS[:-1]]
+    encoded.append(map(float.__repr__, columns['age'].tolist()))
+    return '\n'.join(ROW_TEMPLATE % fields for fields in zip(*encoded))
+
+def batch_processing(batch_size, columnar=False, ndjson=False, adaptive=False):
+    #adaptive=True sizes every fetch with an AdaptiveBatchSizer starting at
+    #batch_size and prints its per-fetch report to stderr at the end
+    sizer = AdaptiveBatchSizer(initial=batch_size) if adaptive else None
+    try:
+        if columnar:
+            columnar_batch_processing(batch_size, sizer)
+        elif ndjson:
+            ndjson_batch_processing(batch_size, sizer)
+        else:
+            print_batch_processing(batch_size, sizer)
+    finally:
+        if sizer is not None:
+            sizer.report()
+
+def print_batch_processing(batch_size, sizer=None):
+    with stream_users_in_batches(batch_size, sizer=sizer) as batches:
+        for batch in batches:
+            filtered_user = []
+            for row in batch:
+                age = row['age']
+                if isinstance(age, (int, float, decimal.Decimal)):
+                    age = float(age)
+                    if age > 25:
+                        filtered_user.append({**row, 'age': age})
+            for user in filtered_user:
+                print(json.dumps(user, indent=2))
+
+def ndjson_batch_processing(batch_size, sizer=None):
+    #Same filter, compact one-line documents written once per batch
+    output = __import__('ndjson')
+    with stream_users_in_batches(batch_size, sizer=sizer) as batches, output.NDJSONWriter() as writer:
+        for batch in batches:
+            writer.write_rows(row for row in batch if row['age'] > 25)
+
+def columnar_batch_processing(batch_size, sizer=None):
+    #Output is built and written once per batch rather than once per row
+    write = sys.stdout.write
+    with stream_users_in_batches(batch_size, columnar=True, sizer=sizer) as batches:
+        for columns in batches:
+            selected = filter_columns(columns)
+            if not len(selected['age']):
+                continue
+            write(encode_columns(selected) + '\n')
@@ -4,5 +4,6 @@ stream_users = __import__('0-stream_users')
 
 # iterate over the generator function and print only the first 6 rows
 
-for user in islice(stream_users.stream_users(), 6):
-    print(user)
\ No newline at end of file
+with stream_users.stream_users() as users:
+    for user in islice(users, 6):
+        print(user)
\ No newline at end of file
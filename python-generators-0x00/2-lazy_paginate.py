@@ -1,22 +1,116 @@
 #!/usr/bin/python3
 
+import base64
 import decimal
+import json
+import sys
+import time
 
 seed = __import__('seed')
+queries = __import__('queries')
+streams = __import__('streams')
+
+# Columns a keyset page may be ordered by; user_id is the primary key and
+# breaks ties for every other column
+KEYSET_COLUMNS = ('user_id', 'age', 'email')
+
+class Page(list):
+    """A page of rows plus the opaque cursor that resumes after its last row"""
+    def __init__(self, rows, next_cursor=None):
+        super().__init__(rows)
+        self.next_cursor = next_cursor
+
+def encode_cursor(key, row):
+    values = [row['user_id']] if key == 'user_id' else [row[key], row['user_id']]
+    values = [str(value) if isinstance(value, decimal.Decimal) else value for value in values]
+    payload = json.dumps({'key': key, 'after': values}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor):
+    # A cursor comes back from the client, so its key must be one the seek
+    # SQL may name and it must carry one value per ORDER BY column
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        key, after = payload['key'], payload['after']
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid page cursor: {cursor!r}")
+    if key not in KEYSET_COLUMNS or not isinstance(after, list) or \
+            len(after) != (1 if key == 'user_id' else 2):
+        raise ValueError(f"Invalid page cursor: {cursor!r}")
+    return key, after
 
 def paginate_users(page_size, offset):
-    connection = seed.connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
-    rows = cursor.fetchall()
-    connection.close()
+    sql, params = queries.build_select('user_data', limit=page_size, offset=offset)
+    with seed.pooled_connection() as connection:
+        cursor = queries.execute(connection, sql, params, dictionary=True)
+        rows = cursor.fetchall()
+        cursor.close()
     return rows
 
-def lazy_pagination(page_size):
-    offset = 0
-    while True:
-        page = paginate_users(page_size, offset)
-        if not page:
-            break
-        yield page
-        offset += page_size
\ No newline at end of file
+def paginate_users_after(statements, page_size, key='user_id', after=None):
+    # Seek past the last row of the previous page instead of counting
+    # OFFSET rows, so every page costs the same whatever its position.
+    # statements is a queries.StatementCache: the first page and the seek
+    # pages are two statement texts, each prepared once on the connection
+    # and re-executed for every later page
+    if key not in KEYSET_COLUMNS:
+        raise ValueError(f"Cannot paginate on {key!r}; use one of {KEYSET_COLUMNS}")
+    order = ['user_id'] if key == 'user_id' else [key, 'user_id']
+    seek = (order, after) if after is not None else None
+    sql, params = queries.build_select('user_data', order_by=order, limit=page_size, seek=seek)
+    rows = statements.fetchall(sql, params)
+    return Page(rows, encode_cursor(key, rows[-1]) if rows else None)
+
+@streams.managed
+def lazy_pagination(connection, page_size, cursor=None, key='user_id'):
+    # One pooled connection for the whole walk; pass a page's next_cursor
+    # back in to continue after a restart
+    after = None
+    if cursor is not None:
+        key, after = decode_cursor(cursor)
+    statements = queries.StatementCache(connection, dictionary=True)
+    try:
+        while True:
+            page = paginate_users_after(statements, page_size, key, after)
+            if not page:
+                break
+            yield page
+            if len(page) < page_size:
+                break
+            key, after = decode_cursor(page.next_cursor)
+    finally:
+        statements.close()
+
+def walk_connect_per_page(page_size, pages):
+    # The original walk: a fresh TCP + auth handshake for every page
+    for page in range(pages):
+        connection = seed.connect_to_prodev()
+        sql, params = queries.build_select('user_data', limit=page_size, offset=page * page_size)
+        cursor = queries.execute(connection, sql, params, dictionary=True)
+        cursor.fetchall()
+        cursor.close()
+        connection.close()
+
+def walk_pooled_per_page(page_size, pages):
+    for page in range(pages):
+        paginate_users(page_size, page * page_size)
+
+def walk_keyset(page_size, pages):
+    with lazy_pagination(page_size) as walk:
+        for page_number, page in enumerate(walk, 1):
+            if page_number == pages:
+                break
+
+def benchmark_page_walk(page_size=100, pages=50):
+    for label, walk in (('connect per page', walk_connect_per_page),
+                        ('pooled per page', walk_pooled_per_page),
+                        ('keyset, one pooled connection', walk_keyset)):
+        start = time.perf_counter()
+        walk(page_size, pages)
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {pages} pages of {page_size} in {elapsed:.3f}s "
+              f"({elapsed / pages * 1000:.2f} ms/page)")
+
+if __name__ == "__main__":
+    if '--benchmark' in sys.argv[1:]:
+        benchmark_page_walk()
@@ -4,6 +4,8 @@ processing = __import__('1-batch_processing')
 
 ##### print processed users in a batch of 50
 try:
-    processing.batch_processing(50)
+    processing.batch_processing(50, columnar='--columnar' in sys.argv[1:],
+                                ndjson='--ndjson' in sys.argv[1:],
+                                adaptive='--adaptive' in sys.argv[1:])
 except BrokenPipeError:
     sys.stderr.close()
\ No newline at end of file
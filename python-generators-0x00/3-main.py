@@ -1,12 +1,18 @@
 #!/usr/bin/python3
 import sys
 lazy_paginator = __import__('2-lazy_paginate').lazy_pagination
+ndjson = __import__('ndjson')
 
 
 try:
-    for page in lazy_paginator(100):
-        for user in page:
-            print(user)
+    if '--ndjson' in sys.argv[1:]:
+        with ndjson.NDJSONWriter() as writer:
+            for page in lazy_paginator(100):
+                writer.write_rows(page)
+    else:
+        for page in lazy_paginator(100):
+            for user in page:
+                print(user)
 
 except BrokenPipeError:
     sys.stderr.close()
\ No newline at end of file
@@ -1,38 +1,187 @@
 #!/usr/bin/python3
 
 import decimal
+import math
+import sys
+import time
+from mysql.connector import Error
 
 seed = __import__('seed')
+queries = __import__('queries')
+streams = __import__('streams')
 
-def stream_user_ages():
-    connection = seed.connect_to_prodev()
-    cursor = connection.cursor()
-    cursor.execute('SELECT * FROM user_data')
+AGGREGATE_AGES_SQL = (
+    "SELECT COUNT(age), SUM(age), MIN(age), MAX(age), VAR_POP(age) FROM user_data"
+)
 
-    while True:
+# Reads the running totals seed maintains at ingest time; MIN/MAX are two
+# lookups on idx_user_data_age, so nothing here scans the table
+SUMMARY_AGES_SQL = (
+    "SELECT s.row_count, s.age_sum_cents, s.age_sum_sq_cents, "
+    "(SELECT MIN(age) FROM user_data), (SELECT MAX(age) FROM user_data) "
+    "FROM user_data_age_summary s WHERE s.id = 1"
+)
+
+class AgeStats:
+    """Single-pass count/sum/mean/min/max/variance (Welford's algorithm)"""
+    __slots__ = ('count', 'total', 'mean', 'm2', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    @classmethod
+    def from_aggregates(cls, count, total, minimum, maximum, variance):
+        stats = cls()
+        if count:
+            stats.count = count
+            stats.total = float(total)
+            stats.mean = stats.total / count
+            stats.m2 = float(variance) * count
+            stats.minimum = float(minimum)
+            stats.maximum = float(maximum)
+        return stats
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.minimum:
+            self.minimum = value
+        if value > self.maximum:
+            self.maximum = value
+
+    def merge(self, other):
+        #Combines two partial results (Chan et al.), so partitions can be
+        #aggregated separately and reduced afterwards
+        if not other.count:
+            return self
+        if not self.count:
+            for name in self.__slots__:
+                setattr(self, name, getattr(other, name))
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.total += other.total
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else 0.0
+
+    def as_dict(self):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.mean,
+            'min': self.minimum,
+            'max': self.maximum,
+            'variance': self.variance,
+        }
+
+@streams.managed
+def stream_user_ages(connection, prefetch=1000):
+    #Prepared statement streamed prefetch rows at a time; only the age
+    #column is sent over the wire
+    sql, params = queries.build_select('user_data', ['age'])
+    cursor = queries.execute(connection, sql, params)
+    try:
+        while True:
+            rows = cursor.fetchmany(prefetch)
+            if not rows:
+                break
+            for (age,) in rows:
+                if isinstance(age, decimal.Decimal):
+                    age = float(age)
+                yield age
+    finally:
+        cursor.close()
+
+def aggregate_ages_in_sql():
+    #The server reduces the table to one row; nothing else crosses the wire
+    with seed.pooled_connection() as connection:
+        cursor = queries.execute(connection, AGGREGATE_AGES_SQL)
         row = cursor.fetchone()
-        if row is None:
-            break
-        age = row[3]
-        if isinstance(age, decimal.Decimal):
-            age = float(age)
-        yield age
-    cursor.close()
-
-def calculate_average_age():
-    total_age = 0.0
-    count = 0
-
-    for age in stream_user_ages():
-        total_age += age
-        count += 1
-
-    if count > 0:
-        average = total_age/count
-        print(f"Average age of users: {average: .2f}")
+        cursor.close()
+    return AgeStats.from_aggregates(*row)
+
+def aggregate_ages_from_summary():
+    with seed.pooled_connection() as connection:
+        cursor = queries.execute(connection, SUMMARY_AGES_SQL)
+        row = cursor.fetchone()
+        cursor.close()
+    if row is None:
+        raise Error("user_data_age_summary is empty")
+    count, cents, squares, minimum, maximum = (int(row[0]), int(row[1]), int(row[2]),
+                                               row[3], row[4])
+    if not count:
+        return AgeStats()
+    variance = (squares - cents * cents / count) / count / 10000
+    return AgeStats.from_aggregates(count, cents / 100, minimum, maximum, variance)
+
+def age_histogram():
+    #{bucket start age: rows}, buckets seed.AGE_BUCKET_WIDTH years wide
+    with seed.pooled_connection() as connection:
+        cursor = queries.execute(
+            connection,
+            "SELECT bucket, row_count FROM user_data_age_histogram "
+            "WHERE row_count != 0 ORDER BY bucket")
+        rows = cursor.fetchall()
+        cursor.close()
+    return {int(bucket) * seed.AGE_BUCKET_WIDTH: int(count) for bucket, count in rows}
+
+def aggregate_ages_streaming():
+    stats = AgeStats()
+    with stream_user_ages() as ages:
+        for age in ages:
+            stats.add(age)
+    return stats
+
+def aggregate_ages(pushdown=True, use_summary=True):
+    #Cheapest first: the ingest-time summary, then one aggregate query, then
+    #a streaming pass over every age
+    if pushdown and use_summary:
+        try:
+            return aggregate_ages_from_summary()
+        except Error as e:
+            print(f"Age summary unavailable, aggregating in SQL: {e}", file=sys.stderr)
+    if pushdown:
+        try:
+            return aggregate_ages_in_sql()
+        except Error as e:
+            print(f"Aggregation push-down failed, streaming instead: {e}", file=sys.stderr)
+    return aggregate_ages_streaming()
+
+def calculate_average_age(pushdown=True):
+    stats = aggregate_ages(pushdown)
+
+    if stats.count > 0:
+        print(f"Average age of users: {stats.mean: .2f}")
+
+def benchmark_aggregation():
+    for label, aggregate in (('summary table', aggregate_ages_from_summary),
+                             ('sql push-down', aggregate_ages_in_sql),
+                             ('streaming', aggregate_ages_streaming)):
+        start = time.perf_counter()
+        stats = aggregate()
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {stats.count} rows in {elapsed:.3f}s -> {stats.as_dict()}")
 
 if __name__ == "__main__":
-    connection = seed.connect_to_prodev()
-    if connection:
-        calculate_average_age() 
-        connection.close()
\ No newline at end of file
+    if '--benchmark' in sys.argv[1:]:
+        benchmark_aggregation()
+    else:
+        calculate_average_age(pushdown='--streaming' not in sys.argv[1:])
\ No newline at end of file
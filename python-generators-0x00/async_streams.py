@@ -0,0 +1,161 @@
+#!/usr/bin/python3
+
+import asyncio
+from contextlib import aclosing
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+
+seed = __import__('seed')
+queries = __import__('queries')
+UserRow = __import__('0-stream_users').UserRow
+paginate = __import__('2-lazy_paginate')
+
+_DONE = object()
+_pool = None
+_pool_lock = asyncio.Lock()
+
+def _require_driver():
+    if aiomysql is None:
+        raise ImportError("async streams need aiomysql (pip install aiomysql)")
+
+async def get_pool():
+    #Async counterpart of seed.get_pool(), same PRODEV_* settings. The lock
+    #stops tasks that all find no pool from each creating one across the
+    #await, which would leave every pool but the last open
+    global _pool
+    _require_driver()
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                config = seed.server_config()
+                _pool = await aiomysql.create_pool(
+                    minsize = 1,
+                    maxsize = seed.pool_config()['size'],
+                    host = config['host'],
+                    port = config['port'],
+                    user = config['user'],
+                    password = config['password'],
+                    db = seed.database_name()
+                )
+    return _pool
+
+async def _pump(fetch, queue):
+    #Producer: queue.put waits while the queue is full, so a slow consumer
+    #stops the fetching instead of letting rows pile up in memory
+    try:
+        while True:
+            chunk = await fetch()
+            if not chunk:
+                break
+            await queue.put(chunk)
+    except asyncio.CancelledError:
+        raise
+    except Exception as error:
+        await queue.put(error)
+        return
+    await queue.put(_DONE)
+
+async def _prefetched(open_fetch, prefetch):
+    #Runs fetch() in a background task, at most prefetch chunks ahead of the
+    #consumer. open_fetch(connection) returns the fetch coroutine function
+    pool = await get_pool()
+    connection = await pool.acquire()
+    producer = None
+    finished = False
+    try:
+        fetch = await open_fetch(connection)
+        queue = asyncio.Queue(maxsize=prefetch)
+        producer = asyncio.ensure_future(_pump(fetch, queue))
+        while True:
+            chunk = await queue.get()
+            if chunk is _DONE:
+                finished = True
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+    finally:
+        if producer is not None and not producer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+        if not finished:
+            #Unread rows may still be on the wire; drop the socket and let
+            #the pool open a fresh one
+            connection.close()
+        pool.release(connection)
+
+def _server_side(sql, params, size, cursor_class):
+    async def open_fetch(connection):
+        cursor = await connection.cursor(cursor_class)
+        await cursor.execute(sql, params)
+
+        async def fetch():
+            rows = await cursor.fetchmany(size)
+            if not rows:
+                await cursor.close()
+            return rows
+        return fetch
+    return open_fetch
+
+async def astream_users(prefetch=100):
+    _require_driver()
+    sql, params = queries.build_select('user_data', UserRow._fields)
+    fetch = _server_side(sql, params, prefetch, aiomysql.SSCursor)
+    from_row = UserRow.from_row
+    async with aclosing(_prefetched(fetch, 2)) as chunks:
+        async for rows in chunks:
+            for row in rows:
+                yield from_row(row)
+
+async def astream_users_in_batches(batch_size, prefetch=2):
+    _require_driver()
+    sql, params = queries.build_select('user_data')
+    fetch = _server_side(sql, params, batch_size, aiomysql.SSDictCursor)
+    async with aclosing(_prefetched(fetch, prefetch)) as batches:
+        async for batch in batches:
+            yield batch
+
+async def alazy_pagination(page_size, cursor=None, key='user_id', prefetch=2):
+    #Keyset pages over one pooled connection, up to prefetch pages ahead;
+    #pages and resume cursors are the same as lazy_pagination's
+    _require_driver()
+    after = None
+    if cursor is not None:
+        key, after = paginate.decode_cursor(cursor)
+    if key not in paginate.KEYSET_COLUMNS:
+        raise ValueError(f"Cannot paginate on {key!r}; use one of {paginate.KEYSET_COLUMNS}")
+    order = ['user_id'] if key == 'user_id' else [key, 'user_id']
+    state = {'after': after, 'done': False}
+
+    async def open_fetch(connection):
+        async def fetch():
+            if state['done']:
+                return None
+            seek = (order, state['after']) if state['after'] is not None else None
+            sql, params = queries.build_select('user_data', order_by=order,
+                                               limit=page_size, seek=seek)
+            async with connection.cursor(aiomysql.DictCursor) as page_cursor:
+                await page_cursor.execute(sql, params)
+                rows = await page_cursor.fetchall()
+            if not rows:
+                return None
+            page = paginate.Page(rows, paginate.encode_cursor(key, rows[-1]))
+            state['after'] = paginate.decode_cursor(page.next_cursor)[1]
+            state['done'] = len(rows) < page_size
+            return page
+        return fetch
+
+    async with aclosing(_prefetched(open_fetch, prefetch)) as pages:
+        async for page in pages:
+            yield page
+
+async def main():
+    async with aclosing(astream_users()) as users:
+        async for user in users:
+            print(user.as_json())
+
+if __name__ == "__main__":
+    asyncio.run(main())
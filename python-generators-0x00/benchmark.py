@@ -0,0 +1,168 @@
+#!/usr/bin/python3
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import resource
+import sys
+import time
+
+seed = __import__('seed')
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+def _consume_stream_users():
+    users = __import__('0-stream_users')
+    with users.stream_users() as rows:
+        for row in rows:
+            yield 1
+
+def _consume_batches():
+    processing = __import__('1-batch_processing')
+    with processing.stream_users_in_batches(1000) as batches:
+        for batch in batches:
+            yield len(batch)
+
+def _consume_pages():
+    paginate = __import__('2-lazy_paginate')
+    with paginate.lazy_pagination(1000) as pages:
+        for page in pages:
+            yield len(page)
+
+def _consume_average_streaming():
+    ages = __import__('4-stream_ages')
+    stats = ages.AgeStats()
+    with ages.stream_user_ages() as values:
+        for age in values:
+            stats.add(age)
+            if stats.count == 1:
+                yield 0
+    yield stats.count
+
+def _consume_average_pushdown():
+    ages = __import__('4-stream_ages')
+    yield ages.aggregate_ages_in_sql().count
+
+# Each target yields row counts as it goes; the first yield marks the first
+# row, the sum is the number of rows processed
+TARGETS = {
+    'stream_users': _consume_stream_users,
+    'stream_users_in_batches': _consume_batches,
+    'lazy_pagination': _consume_pages,
+    'calculate_average_age[streaming]': _consume_average_streaming,
+    'calculate_average_age[pushdown]': _consume_average_pushdown,
+}
+
+def run_target(name, results):
+    #Runs in a fresh process so ru_maxrss is this target's own peak. A
+    #failure is sent back as {'error': ...} so measure() never waits on it
+    try:
+        results.put(_run_target(name))
+    except Exception as e:
+        results.put({'error': f"{type(e).__name__}: {e}"})
+
+def _run_target(name):
+    start = time.perf_counter()
+    first = None
+    rows = 0
+    for count in TARGETS[name]():
+        if first is None:
+            first = time.perf_counter() - start
+        rows += count
+    elapsed = time.perf_counter() - start
+    return {
+        'rows': rows,
+        'seconds': elapsed,
+        'rows_per_s': rows / elapsed if elapsed > 0 else None,
+        'time_to_first_row_ms': first * 1000 if first is not None else None,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+def measure(name, timeout=None):
+    #Polls so a child that dies without reporting (killed, segfault) or
+    #runs past timeout seconds is reported as an error instead of hanging
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=run_target, args=(name, results))
+    process.start()
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        try:
+            result = results.get(timeout=0.5)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                result = {'error': f"exited with code {process.exitcode} without a result"}
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                process.terminate()
+                result = {'error': f"timed out after {timeout}s"}
+                break
+    process.join()
+    return result
+
+def prepare_dataset(size):
+    #Rebuilds the scratch database with exactly size synthetic rows
+    connection = seed.connect_db()
+    if not connection:
+        raise SystemExit("Cannot reach the MySQL server; check the PRODEV_* settings")
+    seed.create_database(connection)
+    connection.close()
+    connection = seed.connect_to_prodev()
+    cursor = connection.cursor()
+    cursor.execute("DROP TABLE IF EXISTS user_data, user_data_age_summary, user_data_age_histogram")
+    cursor.close()
+    seed.create_table(connection)
+    start = time.perf_counter()
+    seed.insert_rows(connection, seed.synthetic_rows(size, seed_value=size))
+    seed.report_throughput(f"synthesized {size}", size, time.perf_counter() - start)
+    connection.close()
+
+def compare(results, baseline_path):
+    with open(baseline_path) as baseline_file:
+        baseline = {(r['target'], r['size']): r for r in json.load(baseline_file)['results']}
+    for result in results:
+        before = baseline.get((result['target'], result['size']))
+        if 'error' in result or not before or 'error' in before:
+            continue
+        if before['seconds'] and result['seconds']:
+            print(f"{result['target']} @ {result['size']}: "
+                  f"{before['seconds'] / result['seconds']:.2f}x speed, "
+                  f"rss {result['peak_rss_kb'] - before['peak_rss_kb']:+d} KB")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the python-generators-0x00 streams")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--targets', nargs='+', choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument('--database', default='ALX_prodev_bench',
+                        help="scratch database that is dropped and refilled per size")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help="earlier results file to compare against")
+    parser.add_argument('--timeout', type=float,
+                        help="seconds before a target is stopped and recorded as an error")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    #Set before any pool exists and inherited by the spawned children
+    os.environ['PRODEV_DATABASE'] = args.database
+    results = []
+    for size in args.sizes:
+        prepare_dataset(size)
+        for name in args.targets:
+            result = {'target': name, 'size': size, **measure(name, args.timeout)}
+            results.append(result)
+            print(json.dumps(result), file=sys.stderr)
+    with open(args.output, 'w') as output:
+        json.dump({
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results,
+        }, output, indent=2)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
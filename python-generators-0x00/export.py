@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+
+import argparse
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+seed = __import__('seed')
+processing = __import__('1-batch_processing')
+
+def user_schema():
+    #age stays exact: DECIMAL(5, 2) in MySQL, decimal128(5, 2) in Arrow
+    return pa.schema([
+        ('user_id', pa.string()),
+        ('name', pa.string()),
+        ('email', pa.string()),
+        ('age', pa.decimal128(5, 2)),
+    ])
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("columnar export needs pyarrow (pip install pyarrow)")
+
+def record_batches(batch_size):
+    schema = user_schema()
+    with processing.stream_users_in_batches(batch_size) as batches:
+        for batch in batches:
+            yield pa.RecordBatch.from_pylist(batch, schema=schema)
+
+def export_parquet(path, batch_size=65536, compression='zstd'):
+    #Each fetched batch is written as its own row group, so memory stays at
+    #one batch however large user_data is
+    _require_pyarrow()
+    rows = 0
+    with pq.ParquetWriter(path, user_schema(), compression=compression) as writer:
+        for record_batch in record_batches(batch_size):
+            writer.write_table(pa.Table.from_batches([record_batch]))
+            rows += record_batch.num_rows
+    return rows
+
+def export_arrow(path, batch_size=65536):
+    #Arrow IPC file format: one record batch per fetched batch
+    _require_pyarrow()
+    rows = 0
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, user_schema()) as writer:
+            for record_batch in record_batches(batch_size):
+                writer.write_batch(record_batch)
+                rows += record_batch.num_rows
+    return rows
+
+def read_columnar(path, batch_size=65536):
+    #Yields lists of (user_id, name, email, age) tuples from a Parquet or
+    #Arrow IPC export, one batch at a time. Ages go through seed.parse_age,
+    #so a file with float ages rounds exactly as the database will
+    _require_pyarrow()
+    if path.endswith('.parquet'):
+        batches = pq.ParquetFile(path).iter_batches(batch_size=batch_size)
+    else:
+        reader = pa.ipc.open_file(path)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for record_batch in batches:
+        columns = [record_batch.column(name).to_pylist()
+                   for name in ('user_id', 'name', 'email', 'age')]
+        columns[3] = [seed.parse_age(age) for age in columns[3]]
+        yield list(zip(*columns))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export user_data to Parquet or Arrow IPC")
+    parser.add_argument('path')
+    parser.add_argument('--format', choices=['parquet', 'arrow'], default='parquet')
+    parser.add_argument('--batch-size', type=int, default=65536)
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    start = time.perf_counter()
+    if args.format == 'parquet':
+        rows = export_parquet(args.path, args.batch_size)
+    else:
+        rows = export_arrow(args.path, args.batch_size)
+    seed.report_throughput(f"{args.format} export", rows, time.perf_counter() - start)
@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+
+import decimal
+import json
+import sys
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value):
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return str(value)
+
+if orjson is not None:
+    def encode(row):
+        return orjson.dumps(row, default=_default)
+else:
+    _encoder = json.JSONEncoder(separators=(',', ':'), default=_default)
+
+    def encode(row):
+        return _encoder.encode(row).encode()
+
+class NDJSONWriter:
+    """One compact JSON document per line, written and flushed once per batch.
+
+    Uses orjson when it is installed. On close the row count and rows/s go
+    to stderr when report is set, so stdout stays pure NDJSON.
+    """
+    def __init__(self, stream=None, report=True):
+        self.stream = stream or sys.stdout.buffer
+        self.report = report
+        self.rows = 0
+        self.started = time.perf_counter()
+
+    def write_rows(self, rows):
+        lines = [encode(row) for row in rows]
+        if lines:
+            self.stream.write(b'\n'.join(lines) + b'\n')
+            self.stream.flush()
+            self.rows += len(lines)
+
+    def close(self):
+        if self.report:
+            elapsed = time.perf_counter() - self.started
+            rate = self.rows / elapsed if elapsed > 0 else float('inf')
+            print(f"ndjson: {self.rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)",
+                  file=sys.stderr)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
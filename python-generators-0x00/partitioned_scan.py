@@ -0,0 +1,168 @@
+#!/usr/bin/python3
+
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+
+seed = __import__('seed')
+queries = __import__('queries')
+streams = __import__('streams')
+ages = __import__('4-stream_ages')
+
+_DONE = object()
+
+def key_ranges(partitions, bounds=None):
+    #Splits the user_id space into [low, high) ranges; None means unbounded.
+    #Without bounds the split is even on the first 8 hex digits, which only
+    #balances uuid4/uuid5 ids (the row/bulk/resumable/parallel loaders).
+    #--mode load-data stores MySQL UUID() values, version 1, whose leading
+    #digits are the low bits of a timestamp, so a fast load lands in one or
+    #two ranges: pass key_quantiles(partitions) as bounds for those
+    if bounds is None:
+        bounds = ['%08x' % (i * 0x100000000 // partitions) for i in range(1, partitions)]
+    bounds = list(bounds)
+    return list(zip([None] + bounds, bounds + [None]))
+
+def key_quantiles(partitions):
+    #user_id bounds that split the rows into partitions ranges of equal size,
+    #whatever kind of ids the table holds. Costs a COUNT(*) and one walk of
+    #the primary key: each bound seeks past the previous one and skips
+    #count / partitions ids. Fewer bounds come back on a tiny table
+    with seed.pooled_connection() as connection:
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM user_data")
+            (count,) = cursor.fetchone()
+            step = count // partitions
+            bounds = []
+            while step and len(bounds) < partitions - 1:
+                where = [('user_id', '>', bounds[-1])] if bounds else []
+                sql, params = queries.build_select('user_data', ['user_id'], where, ['user_id'],
+                                                   limit=1, offset=step - 1 if bounds else step)
+                cursor.execute(sql, params)
+                row = cursor.fetchone()
+                if row is None:
+                    break
+                bounds.append(row[0])
+        finally:
+            cursor.close()
+    return bounds
+
+def range_conditions(low, high):
+    conditions = []
+    if low is not None:
+        conditions.append(('user_id', '>=', low))
+    if high is not None:
+        conditions.append(('user_id', '<', high))
+    return conditions
+
+@streams.managed
+def scan_partition(connection, low, high, columns=None, ordered=False, prefetch=1000):
+    order_by = ['user_id'] if ordered else ()
+    sql, params = queries.build_select('user_data', columns, range_conditions(low, high), order_by)
+    cursor = queries.execute(connection, sql, params, dictionary=True)
+    try:
+        while True:
+            rows = cursor.fetchmany(prefetch)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+def _put(rows_queue, item, stop):
+    #Blocks while the queue is full, but gives up once the consumer has gone
+    while not stop.is_set():
+        try:
+            rows_queue.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _fill(rows_queue, stream, stop):
+    #Worker thread: pushes one partition's batches into a bounded queue,
+    #pausing its scan while the consumer is behind
+    try:
+        with stream:
+            for batch in stream:
+                if not _put(rows_queue, batch, stop):
+                    return
+    except Exception as error:
+        _put(rows_queue, error, stop)
+    _put(rows_queue, _DONE, stop)
+
+def partitioned_scan(partitions=4, columns=None, ordered=False, prefetch=1000, buffered=4,
+                     quantiles=False):
+    #Scans the key ranges concurrently, one pooled connection per range
+    #(PRODEV_POOL_SIZE should be at least partitions). Unordered mode yields
+    #rows as any partition delivers them; ordered mode yields in user_id
+    #order, with later partitions prefetching up to buffered batches.
+    #quantiles=True splits on key_quantiles rather than the hex digits
+    ranges = key_ranges(partitions, key_quantiles(partitions) if quantiles else None)
+    stop = threading.Event()
+    shared = queue.Queue(maxsize=buffered * partitions)
+    queues = [queue.Queue(maxsize=buffered) if ordered else shared for _ in ranges]
+    workers = [
+        threading.Thread(
+            target=_fill,
+            args=(rows_queue, scan_partition(low, high, columns, ordered, prefetch), stop),
+            daemon=True,
+        )
+        for rows_queue, (low, high) in zip(queues, ranges)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        if ordered:
+            for rows_queue in queues:
+                yield from _drain(rows_queue, 1)
+        else:
+            yield from _drain(shared, len(workers))
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+def _drain(rows_queue, producers):
+    while producers:
+        batch = rows_queue.get()
+        if batch is _DONE:
+            producers -= 1
+        elif isinstance(batch, Exception):
+            raise batch
+        else:
+            yield from batch
+
+def partition_age_stats(bounds):
+    #Process worker: aggregates one key range and returns the partial AgeStats
+    low, high = bounds
+    stats = ages.AgeStats()
+    with scan_partition(low, high, ['age']) as batches:
+        for batch in batches:
+            for row in batch:
+                stats.add(float(row['age']))
+    return stats
+
+def partitioned_average_age(partitions=None, quantiles=False):
+    #Each range is scanned and aggregated in its own process and the partial
+    #results are merged, so the Python side uses every core. spawn keeps
+    #children from inheriting the parent's pooled sockets
+    partitions = partitions or multiprocessing.cpu_count()
+    ranges = key_ranges(partitions, key_quantiles(partitions) if quantiles else None)
+    context = multiprocessing.get_context('spawn')
+    total = ages.AgeStats()
+    with context.Pool(len(ranges)) as pool:
+        for stats in pool.imap_unordered(partition_age_stats, ranges):
+            total.merge(stats)
+    return total
+
+if __name__ == "__main__":
+    arguments = [arg for arg in sys.argv[1:] if arg != '--quantiles']
+    partitions = int(arguments[0]) if arguments else multiprocessing.cpu_count()
+    start = time.perf_counter()
+    stats = partitioned_average_age(partitions, quantiles='--quantiles' in sys.argv[1:])
+    elapsed = time.perf_counter() - start
+    print(f"{partitions} partitions: {stats.count} rows in {elapsed:.3f}s -> {stats.as_dict()}")
@@ -0,0 +1,206 @@
+#!/usr/bin/python3
+
+import operator
+from collections import deque
+from itertools import islice
+
+queries = __import__('queries')
+streams = __import__('streams')
+
+# Python equivalents of the operators queries.build_where accepts, used when
+# a where() stage cannot be pushed into SQL
+COMPARISONS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+class Stage:
+    """Base for lazy transformations: stage(rows) returns a new iterator"""
+
+class Pipeline:
+    """An iterable source followed by stages; nothing runs until iterated.
+
+    Iterating opens the source; it is closed when the rows run out, when the
+    iterator is closed, or by close() / leaving a with block, so breaking
+    out of a pipeline over a Source returns its connection.
+    """
+    def __init__(self, source, stages=()):
+        self.source = source
+        self.stages = tuple(stages)
+        self._open = set()
+
+    def __or__(self, stage):
+        if isinstance(stage, Sink):
+            return stage.consume(self)
+        return Pipeline(self.source, self.stages + (stage,))
+
+    def _rows(self):
+        return iter(self.source)
+
+    def __iter__(self):
+        source = self._rows()
+        self._open.add(source)
+        rows = source
+        for stage in self.stages:
+            rows = stage(rows)
+        try:
+            yield from rows
+        finally:
+            self._open.discard(source)
+            _close(source)
+
+    def close(self):
+        #Closes the source of every iteration still in progress
+        while self._open:
+            _close(self._open.pop())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def _close(rows):
+    close = getattr(rows, 'close', None)
+    if close is not None:
+        close()
+
+class Source(Pipeline):
+    """Rows of a table as dicts; leading where()/select() stages become SQL.
+
+    A where() is only pushed down while no select() has been, so SQL and
+    Python filtering always see the same columns.
+    """
+    def __init__(self, table='user_data', columns=None, where=(), prefetch=1000):
+        super().__init__(self)
+        self.table = table
+        self.columns = columns
+        self.where = tuple(where)
+        self.prefetch = prefetch
+
+    def __or__(self, stage):
+        if isinstance(stage, Where) and stage.condition is not None and self.columns is None:
+            return Source(self.table, self.columns, self.where + (stage.condition,), self.prefetch)
+        if isinstance(stage, Select) and self.columns is None:
+            return Source(self.table, stage.columns, self.where, self.prefetch)
+        return super().__or__(stage)
+
+    def _rows(self):
+        sql, params = queries.build_select(self.table, self.columns, self.where)
+        return select_rows(sql, params, self.prefetch)
+
+@streams.managed
+def select_rows(connection, sql, params, prefetch):
+    cursor = queries.execute(connection, sql, params, dictionary=True)
+    try:
+        while True:
+            rows = cursor.fetchmany(prefetch)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+class Where(Stage):
+    def __init__(self, column, op=None, value=None):
+        if callable(column):
+            self.condition = None
+            self.predicate = column
+        else:
+            if op not in COMPARISONS:
+                raise ValueError(f"Unsupported operator: {op!r}")
+            self.condition = (column, op, value)
+            compare = COMPARISONS[op]
+            self.predicate = lambda row: compare(row[column], value)
+
+    def __call__(self, rows):
+        return filter(self.predicate, rows)
+
+class Select(Stage):
+    def __init__(self, columns):
+        self.columns = tuple(columns)
+
+    def __call__(self, rows):
+        columns = self.columns
+        return ({column: row[column] for column in columns} for row in rows)
+
+class MapRows(Stage):
+    def __init__(self, function):
+        self.function = function
+
+    def __call__(self, rows):
+        return map(self.function, rows)
+
+class Rebatch(Stage):
+    def __init__(self, size):
+        self.size = size
+
+    def __call__(self, rows):
+        while True:
+            batch = list(islice(rows, self.size))
+            if not batch:
+                return
+            yield batch
+
+class Window(Stage):
+    def __init__(self, size, step=1):
+        self.size = size
+        self.step = step
+
+    def __call__(self, rows):
+        #The first window is emitted once it is full, then one every step
+        #rows, so step > size skips the rows in between
+        window = deque(maxlen=self.size)
+        size = self.size
+        step = self.step
+        for seen, row in enumerate(rows, 1):
+            window.append(row)
+            if seen >= size and (seen - size) % step == 0:
+                yield tuple(window)
+
+class Sink:
+    """Terminal stage: drains the pipeline into a callable, returns the count"""
+    def __init__(self, function):
+        self.function = function
+
+    def consume(self, rows):
+        count = 0
+        function = self.function
+        rows = iter(rows)
+        try:
+            for item in rows:
+                function(item)
+                count += 1
+        finally:
+            _close(rows)
+        return count
+
+def pipe(iterable):
+    #Start a pipeline from any existing generator, e.g. pipe(stream_users())
+    return Pipeline(iterable)
+
+def source(table='user_data', prefetch=1000):
+    return Source(table, prefetch=prefetch)
+
+def where(column, op=None, value=None):
+    #where('age', '>', 25) can run in SQL; where(callable) always runs here
+    return Where(column, op, value)
+
+def select(*columns):
+    return Select(columns)
+
+def map_rows(function):
+    return MapRows(function)
+
+def rebatch(size):
+    return Rebatch(size)
+
+def window(size, step=1):
+    return Window(size, step)
+
+def sink(function):
+    return Sink(function)
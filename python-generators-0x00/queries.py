@@ -0,0 +1,100 @@
+#!/usr/bin/python3
+
+import re
+
+# Values always travel as statement parameters; only identifiers are spliced
+# into the SQL text, and only after they pass this check
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+OPERATORS = ('=', '!=', '<', '<=', '>', '>=')
+
+def identifier(name):
+    if not isinstance(name, str) or not IDENTIFIER.match(name):
+        raise ValueError(f"Invalid SQL identifier: {name!r}")
+    return f"`{name}`"
+
+def build_where(conditions):
+    #conditions is a list of (column, operator, value) joined with AND
+    clauses = []
+    params = []
+    for column, operator, value in conditions:
+        if operator not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {operator!r}")
+        clauses.append(f"{identifier(column)} {operator} %s")
+        params.append(value)
+    if not clauses:
+        return '', ()
+    return ' WHERE ' + ' AND '.join(clauses), tuple(params)
+
+def build_seek(columns, values):
+    #Keyset predicate "(c1, c2) > (v1, v2)" spelled out as
+    #c1 > v1 OR (c1 = v1 AND c2 > v2) so MySQL can range-scan the index
+    clauses = []
+    params = []
+    for i, column in enumerate(columns):
+        equal = [f"{identifier(previous)} = %s" for previous in columns[:i]]
+        clauses.append('(' + ' AND '.join(equal + [f"{identifier(column)} > %s"]) + ')')
+        params.extend(values[:i + 1])
+    return '(' + ' OR '.join(clauses) + ')', tuple(params)
+
+def build_select(table, columns=None, where=(), order_by=(), limit=None, offset=None,
+                 seek=None):
+    #Returns (sql, params); limit is a parameter too, so every page of the
+    #same shape is the same statement text and reuses one prepared plan.
+    #seek is an optional (columns, values) pair from build_seek
+    column_sql = ', '.join(identifier(column) for column in columns) if columns else '*'
+    sql = f"SELECT {column_sql} FROM {identifier(table)}"
+    where_sql, params = build_where(where)
+    if seek is not None:
+        seek_sql, seek_params = build_seek(*seek)
+        where_sql += (' AND ' if where_sql else ' WHERE ') + seek_sql
+        params += seek_params
+    sql += where_sql
+    if order_by:
+        sql += ' ORDER BY ' + ', '.join(identifier(column) for column in order_by)
+    if limit is not None:
+        sql += ' LIMIT %s'
+        params += (int(limit),)
+        if offset is not None:
+            sql += ' OFFSET %s'
+            params += (int(offset),)
+    return sql, params
+
+class StatementCache:
+    """Keeps one prepared cursor per statement text on a connection"""
+    def __init__(self, connection, dictionary=False):
+        self.connection = connection
+        self.dictionary = dictionary
+        self.cursors = {}
+        self._texts = {}
+
+    def cursor(self, sql):
+        cursor = self.cursors.get(sql)
+        if cursor is None:
+            cursor = self.connection.cursor(prepared=True, dictionary=self.dictionary)
+            self.cursors[sql] = cursor
+        return cursor
+
+    def execute(self, sql, params=()):
+        #mysql-connector re-prepares unless the text is the very object it
+        #last executed (an identity check, not equality), and build_select
+        #returns a new string every call. Interning the text here is what
+        #lets the cursor skip STMT_CLOSE/STMT_PREPARE on repeat executions
+        sql = self._texts.setdefault(sql, sql)
+        cursor = self.cursor(sql)
+        cursor.execute(sql, params)
+        return cursor
+
+    def fetchall(self, sql, params=()):
+        return self.execute(sql, params).fetchall()
+
+    def close(self):
+        for cursor in self.cursors.values():
+            cursor.close()
+        self.cursors.clear()
+        self._texts.clear()
+
+def execute(connection, sql, params=(), dictionary=False):
+    #One-off prepared statement; use StatementCache for repeated queries
+    cursor = connection.cursor(prepared=True, dictionary=dictionary)
+    cursor.execute(sql, params)
+    return cursor
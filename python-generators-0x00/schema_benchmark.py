@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+
+import sys
+import time
+
+seed = __import__('seed')
+
+# The old layout (duplicate user_id index, nothing on age/email) and the
+# current one, each loaded into its own scratch table
+LAYOUTS = {
+    'old': "INDEX(user_id)",
+    'new': "INDEX idx_user_data_age (age), INDEX idx_user_data_email (email)",
+}
+
+FILTERED_QUERIES = {
+    'age > 25 count': "SELECT COUNT(*) FROM {table} WHERE age > 25",
+    'age scan': "SELECT age FROM {table}",
+    'email lookup': "SELECT user_id FROM {table} WHERE email = %s",
+}
+
+def benchmark_layout(connection, layout, rows, chunk_size=10000):
+    table = f"user_data_bench_{layout}"
+    cursor = connection.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {table}")
+    cursor.execute(f"""
+        CREATE TABLE {table} (
+            user_id CHAR(36) PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            email VARCHAR(100) NOT NULL,
+            age DECIMAL(5, 2) NOT NULL,
+            {LAYOUTS[layout]}
+        )
+    """)
+    insert = f"INSERT INTO {table}(user_id, name, email, age) VALUES(%s, %s, %s, %s)"
+    start = time.perf_counter()
+    chunk = []
+    for row in seed.synthetic_rows(rows):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            cursor.executemany(insert, chunk)
+            connection.commit()
+            chunk = []
+    if chunk:
+        cursor.executemany(insert, chunk)
+        connection.commit()
+    seed.report_throughput(f"{layout} insert", rows, time.perf_counter() - start)
+    for label, query in FILTERED_QUERIES.items():
+        params = (f"user{rows // 2}@example.com",) if '%s' in query else ()
+        start = time.perf_counter()
+        cursor.execute(query.format(table=table), params)
+        cursor.fetchall()
+        print(f"{layout} {label}: {(time.perf_counter() - start) * 1000:.2f} ms")
+    cursor.execute(f"DROP TABLE {table}")
+    cursor.close()
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    connection = seed.connect_to_prodev()
+    if connection:
+        for layout in LAYOUTS:
+            benchmark_layout(connection, layout, rows)
+        connection.close()
@@ -1,17 +1,113 @@
 #!/usr/bin/python3
 
 import mysql.connector
-from mysql.connector import Error
-import pandas as pd
+from mysql.connector import Error, pooling
+import argparse
+import csv
+from contextlib import contextmanager
+from decimal import Decimal, ROUND_HALF_UP
+import json
+import multiprocessing
+import os
+import random
+import time
 import uuid
 
+INSERT_USER_SQL = """
+    INSERT INTO user_data(user_id, name, email, age)
+    VALUES(%s, %s, %s, %s)
+"""
+
+UPSERT_USER_SQL = INSERT_USER_SQL + """
+    ON DUPLICATE KEY UPDATE name = VALUES(name), email = VALUES(email), age = VALUES(age)
+"""
+
+USER_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, 'ALX_prodev/user_data')
+
+_pool = None
+
+# Secondary indexes for the real access paths: age filters/scans
+# (batch_processing, stream_user_ages) and email lookups. InnoDB secondary
+# indexes carry the primary key, so both also cover user_id
+USER_DATA_INDEXES = {
+    'idx_user_data_age': 'age',
+    'idx_user_data_email': 'email',
+}
+
+# Running age aggregates kept up to date by every writer in this module, so
+# average and distribution queries read one row instead of scanning
+# user_data. Ages are summed in cents so the totals are exact integers
+AGE_BUCKET_WIDTH = 10
+
+# Lock wait timeout and deadlock: the chunk is rolled back and written again.
+# So is a duplicate key: user_id is the only unique key, so it means another
+# worker inserted one of the chunk's ids after upsert_users read them
+RETRY_ERRNOS = (1062, 1205, 1213)
+
+AGE_SUMMARY_TABLES_SQL = [
+    """
+        CREATE TABLE IF NOT EXISTS user_data_age_summary (
+            id TINYINT PRIMARY KEY,
+            row_count BIGINT NOT NULL,
+            age_sum_cents BIGINT NOT NULL,
+            age_sum_sq_cents DECIMAL(38, 0) NOT NULL
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS user_data_age_histogram (
+            bucket SMALLINT PRIMARY KEY,
+            row_count BIGINT NOT NULL
+        )
+    """,
+]
+
+RECORD_AGE_SUMMARY_SQL = """
+    INSERT INTO user_data_age_summary(id, row_count, age_sum_cents, age_sum_sq_cents)
+    VALUES(1, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        row_count = row_count + VALUES(row_count),
+        age_sum_cents = age_sum_cents + VALUES(age_sum_cents),
+        age_sum_sq_cents = age_sum_sq_cents + VALUES(age_sum_sq_cents)
+"""
+
+RECORD_AGE_BUCKET_SQL = """
+    INSERT INTO user_data_age_histogram(bucket, row_count) VALUES(%s, %s)
+    ON DUPLICATE KEY UPDATE row_count = row_count + VALUES(row_count)
+"""
+
+SCAN_AGE_SUMMARY_SQL = """
+    SELECT COUNT(*), COALESCE(SUM(ROUND(age * 100)), 0),
+           COALESCE(SUM(ROUND(age * 100) * ROUND(age * 100)), 0)
+    FROM user_data
+"""
+
+SCAN_AGE_HISTOGRAM_SQL = f"""
+    SELECT FLOOR(age / {AGE_BUCKET_WIDTH}), COUNT(*) FROM user_data
+    GROUP BY FLOOR(age / {AGE_BUCKET_WIDTH})
+"""
+
+def server_config():
+    #Credentials come from the environment so none are kept in the source
+    return {
+        'host': os.environ.get('PRODEV_HOST', 'localhost'),
+        'port': int(os.environ.get('PRODEV_PORT', 3306)),
+        'user': os.environ.get('PRODEV_USER', 'root'),
+        'password': os.environ.get('PRODEV_PASSWORD', ''),
+    }
+
+def database_name():
+    return os.environ.get('PRODEV_DATABASE', 'ALX_prodev')
+
+def pool_config():
+    return {
+        'size': int(os.environ.get('PRODEV_POOL_SIZE', 5)),
+        'timeout': float(os.environ.get('PRODEV_POOL_TIMEOUT', 10)),
+        'ping': os.environ.get('PRODEV_POOL_PING', '1') != '0',
+    }
+
 def connect_db():
     try:
-        connection = mysql.connector.connect(
-            host = 'localhost',
-            user = 'root',
-            password = 'bini'
-        )
+        connection = mysql.connector.connect(**server_config())
 
         if connection.is_connected():
             return connection
@@ -25,31 +121,100 @@ def create_database(connection):
         cursor = connection.cursor()
 
         #SQL command to create new database
-        cursor.execute('CREATE DATABASE IF NOT EXISTS ALX_prodev')
+        cursor.execute(f'CREATE DATABASE IF NOT EXISTS `{database_name()}`')
         cursor.close()
     except Error as e:
         print(f"Error creating database: {e}")
 
-def connect_to_prodev():
+def connect_to_prodev(**options):
     try:
         connection = mysql.connector.connect(
-            host = 'localhost',
-            user = 'root',
-            password = 'bini',
-            database = 'ALX_prodev'
+            database = database_name(),
+            **server_config(),
+            **options
         )
 
         if connection.is_connected():
             return connection
     except Error as e:
-        print(f"Error while connecting to 'ALX_prodev' Database: {e}")
+        print(f"Error while connecting to '{database_name()}' Database: {e}")
         return None
 
+def get_pool():
+    #One process-wide pool shared by every generator, sized by
+    #PRODEV_POOL_SIZE. Sessions are not reset on return because
+    #discard_connection may hand back a closed socket, which the pool
+    #reconnects on the next checkout instead
+    global _pool
+    if _pool is None:
+        _pool = pooling.MySQLConnectionPool(
+            pool_name = 'alx_prodev',
+            pool_size = pool_config()['size'],
+            pool_reset_session = False,
+            database = database_name(),
+            **server_config()
+        )
+    return _pool
+
+def checkout():
+    #Waits up to PRODEV_POOL_TIMEOUT seconds for a free connection, then
+    #pings it (reconnecting once if the server dropped it while idle) so
+    #callers never get a dead socket out of the pool, then ends any
+    #transaction left open so every checkout starts from a fresh snapshot
+    config = pool_config()
+    deadline = time.monotonic() + config['timeout']
+    while True:
+        try:
+            connection = get_pool().get_connection()
+            break
+        except mysql.connector.errors.PoolError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.01)
+    try:
+        if config['ping']:
+            connection.ping(reconnect=True, attempts=2, delay=0)
+        #The pool does not reset sessions (see get_pool), and autocommit is
+        #off, so the last borrower's transaction and its REPEATABLE READ
+        #snapshot would otherwise carry over and hide newer commits
+        connection.rollback()
+    except Error:
+        connection.close()
+        raise
+    return connection
+
+@contextmanager
+def pooled_connection():
+    #Checks a connection out of the shared pool for the length of a with block
+    connection = checkout()
+    try:
+        yield connection
+    finally:
+        release(connection)
+
+def release(connection):
+    #Returns a checked-out connection to the pool, ending its transaction
+    #first so an idle pooled session never pins an old read view (which
+    #would also hold back undo purge). A discarded socket has nothing to end
+    try:
+        connection.rollback()
+    except Error:
+        pass
+    connection.close()
+
+def discard_connection(connection):
+    #A stream abandoned mid-result leaves unread rows on the wire; drop the
+    #socket rather than drain the rest of the table before reuse
+    try:
+        getattr(connection, '_cnx', connection).disconnect()
+    except Error:
+        pass
+
 def create_table(connection):
     try:
         cursor = connection.cursor()
         #SQL command to use the database already created
-        cursor.execute('USE ALX_prodev')
+        cursor.execute(f'USE `{database_name()}`')
 
         #SQL command to create new table
         create_table_sql = """
@@ -58,42 +223,588 @@ def create_table(connection):
                 name VARCHAR(100) NOT NULL,
                 email VARCHAR(100) NOT NULL,
                 age DECIMAL(5, 2) NOT NULL,
-                INDEX(user_id)
+                INDEX idx_user_data_age (age),
+                INDEX idx_user_data_email (email)
             )
         """
         cursor.execute(create_table_sql)
         print("Table user_data created successfully")
         cursor.close()
+        migrate_schema(connection)
+        ensure_age_summary(connection)
     except Error as e:
         print(f"Error while creating table: {e}")
-def insert_data(connection, data):
+
+def migrate_schema(connection):
+    #Brings a table created by an older create_table up to date: drops the
+    #INDEX(user_id) that duplicated the primary key (an extra B-tree to
+    #update on every insert) and adds any missing USER_DATA_INDEXES
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT INDEX_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX)
+        FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'user_data'
+        GROUP BY INDEX_NAME
+    """)
+    indexes = dict(cursor.fetchall())
+    changes = []
+    for name, columns in indexes.items():
+        if name != 'PRIMARY' and columns == 'user_id':
+            changes.append(f'DROP INDEX `{name}`')
+    for name, column in USER_DATA_INDEXES.items():
+        if name not in indexes:
+            changes.append(f'ADD INDEX `{name}` (`{column}`)')
+    if changes:
+        cursor.execute('ALTER TABLE user_data ' + ', '.join(changes))
+        print(f"Migrated user_data: {', '.join(changes)}")
+    cursor.close()
+    return changes
+
+def ensure_age_summary(connection):
+    #Creates the summary tables; if they have never been filled (new tables,
+    #or a user_data that predates them) they are built from one full scan
+    cursor = connection.cursor()
+    for statement in AGE_SUMMARY_TABLES_SQL:
+        cursor.execute(statement)
+    cursor.execute("SELECT COUNT(*) FROM user_data_age_summary")
+    if cursor.fetchone()[0] == 0:
+        rebuild_age_summary(cursor)
+        connection.commit()
+    cursor.close()
+
+CENT = Decimal('0.01')
+
+def parse_age(value):
+    #Rounds an age to the DECIMAL(5, 2) column's precision the way MySQL
+    #does (half away from zero). Every reader quantizes once, so the value
+    #inserted and the value counted in the summary are the same number
+    return Decimal(str(value).strip()).quantize(CENT, rounding=ROUND_HALF_UP)
+
+def age_cents(age):
+    return int(parse_age(age) * 100)
+
+class AgeDelta:
+    """Net change to the age summary tables from a set of written rows.
+
+    Writers collect one per committed chunk and apply the merged total in
+    its own short transaction, so the single summary row is not held for
+    the length of every row write.
+    """
+    def __init__(self, added=(), removed=()):
+        self.count = 0
+        self.total = 0
+        self.squares = 0
+        self.buckets = {}
+        self.add(added)
+        self.add(removed, -1)
+
+    def add(self, ages, sign=1):
+        for age in ages:
+            cents = age_cents(age)
+            self.count += sign
+            self.total += sign * cents
+            self.squares += sign * cents * cents
+            bucket = cents // (AGE_BUCKET_WIDTH * 100)
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + sign
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.squares += other.squares
+        for bucket, delta in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + delta
+        return self
+
+    def changed_buckets(self):
+        #Sorted so concurrent writers always lock the bucket rows in one order
+        return sorted((bucket, delta) for bucket, delta in self.buckets.items() if delta)
+
+    def __bool__(self):
+        return bool(self.count or self.total or self.squares or self.changed_buckets())
+
+    def write(self, cursor):
+        #Two statements however many rows the delta covers
+        if self.count or self.total or self.squares:
+            cursor.execute(RECORD_AGE_SUMMARY_SQL, (self.count, self.total, self.squares))
+        changed = self.changed_buckets()
+        if changed:
+            cursor.executemany(RECORD_AGE_BUCKET_SQL, changed)
+
+    def apply(self, connection):
+        #Commits the delta on its own and resets it; call only once the rows
+        #it describes are committed
+        if self:
+            cursor = connection.cursor()
+            self.write(cursor)
+            connection.commit()
+            cursor.close()
+        self.__init__()
+
+def apply_summary(connection, delta):
+    #Applies a loader's committed AgeDelta. If that fails the rows stay
+    #loaded and the summary falls behind until --check-summary --repair
+    try:
+        delta.apply(connection)
+    except Error as e:
+        message = f"age summary not updated ({e}); run --check-summary --repair"
+        print(message)
+        return message
+    return None
+
+def record_ages(cursor, added, removed=()):
+    #Writes one batch of inserted (and, for upserts, replaced) ages to the
+    #summary tables in the cursor's current transaction
+    AgeDelta(added, removed).write(cursor)
+
+def rebuild_age_summary(cursor):
+    cursor.execute("DELETE FROM user_data_age_summary")
+    cursor.execute("DELETE FROM user_data_age_histogram")
+    cursor.execute("INSERT INTO user_data_age_summary(id, row_count, age_sum_cents, age_sum_sq_cents) "
+                   "SELECT 1, COUNT(*), COALESCE(SUM(ROUND(age * 100)), 0), "
+                   "COALESCE(SUM(ROUND(age * 100) * ROUND(age * 100)), 0) FROM user_data")
+    cursor.execute("INSERT INTO user_data_age_histogram(bucket, row_count) "
+                   + SCAN_AGE_HISTOGRAM_SQL)
+
+def check_age_summary(connection, repair=False):
+    #Recomputes the aggregates with a full scan and compares them with the
+    #maintained tables; with repair the tables are rebuilt on a mismatch
+    cursor = connection.cursor()
+    cursor.execute(SCAN_AGE_SUMMARY_SQL)
+    scanned = tuple(int(value) for value in cursor.fetchone())
+    cursor.execute("SELECT row_count, age_sum_cents, age_sum_sq_cents "
+                   "FROM user_data_age_summary WHERE id = 1")
+    row = cursor.fetchone()
+    stored = tuple(int(value) for value in row) if row else (0, 0, 0)
+    cursor.execute(SCAN_AGE_HISTOGRAM_SQL)
+    scanned_buckets = {int(bucket): int(count) for bucket, count in cursor.fetchall()}
+    cursor.execute("SELECT bucket, row_count FROM user_data_age_histogram WHERE row_count != 0")
+    stored_buckets = {int(bucket): int(count) for bucket, count in cursor.fetchall()}
+    consistent = scanned == stored and scanned_buckets == stored_buckets
+    if consistent:
+        print(f"Age summary consistent: {stored[0]} rows")
+    else:
+        print(f"Age summary mismatch: stored {stored} / {stored_buckets}, "
+              f"scanned {scanned} / {scanned_buckets}")
+        if repair:
+            rebuild_age_summary(cursor)
+            connection.commit()
+            print("Age summary rebuilt from user_data")
+    cursor.close()
+    return consistent
+
+def read_committed(connection):
+    #Loader sessions run READ COMMITTED, where the FOR UPDATE in upsert_users
+    #locks only the rows that already exist. Under REPEATABLE READ it also
+    #gap-locks every id not inserted yet, and parallel workers deadlock
+    #inserting into each other's gaps. The commit ends any snapshot left
+    #open by setup queries so the next chunk starts at the new level
+    cursor = connection.cursor()
+    cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
+    cursor.close()
+    connection.commit()
+
+def write_chunk(connection, cursor, write, values, attempts=5):
+    #Runs write(cursor, values) and commits, returning its AgeDelta. A
+    #deadlock, lock wait timeout or racing insert (RETRY_ERRNOS) rolls the
+    #chunk back and writes it again
+    for attempt in range(1, attempts + 1):
+        try:
+            delta = write(cursor, values)
+            connection.commit()
+            return delta
+        except Error as e:
+            connection.rollback()
+            if e.errno not in RETRY_ERRNOS or attempt == attempts:
+                raise
+            time.sleep(0.05 * 2 ** attempt * random.random())
+
+def insert_users(cursor, values):
+    #Batched INSERT of (user_id, name, email, age) rows; returns the
+    #AgeDelta to apply once they are committed
+    cursor.executemany(INSERT_USER_SQL, values)
+    return AgeDelta([row[3] for row in values])
+
+def upsert_users(cursor, values):
+    #Batched upsert; returns an AgeDelta that also subtracts the ages being
+    #replaced, so the summary stays exact. Existing rows are locked while
+    #they are read (see read_committed) and upserted; ids that were not
+    #there get a plain INSERT. Under READ COMMITTED nothing stops another
+    #worker inserting one of those ids after the read, and an upsert would
+    #then silently replace a row whose age was never subtracted. The plain
+    #INSERT fails with a duplicate key instead, and write_chunk retries the
+    #chunk, whose read now finds the row. Repeated ids within the batch are
+    #collapsed to their last row, as the upsert itself would
+    values = list({row[0]: row for row in values}.values())
+    placeholders = ', '.join(['%s'] * len(values))
+    cursor.execute(f"SELECT user_id, age FROM user_data WHERE user_id IN ({placeholders}) FOR UPDATE",
+                   [row[0] for row in values])
+    replaced = dict(cursor.fetchall())
+    existing = [row for row in values if row[0] in replaced]
+    new = [row for row in values if row[0] not in replaced]
+    if existing:
+        cursor.executemany(UPSERT_USER_SQL, existing)
+    if new:
+        cursor.executemany(INSERT_USER_SQL, new)
+    return AgeDelta([row[3] for row in values], replaced.values())
+
+CSV_COLUMNS = ('name', 'email', 'age')
+
+def csv_column_positions(header):
+    #Maps name/email/age to their positions in a header row, whatever the
+    #file's column order
+    fields = [field.strip() for field in header]
+    missing = [column for column in CSV_COLUMNS if column not in fields]
+    if missing:
+        raise ValueError(f"CSV header {fields} is missing {missing}")
+    return tuple(fields.index(column) for column in CSV_COLUMNS)
+
+def read_csv_chunks_with_offsets(data, chunk_size=10000, start=0, end=None):
+    #Yields (chunk, offset) where chunk is a list of (name, email, age) tuples
+    #and offset is the byte position just after the chunk's last line, so a
+    #load can be checkpointed and resumed (resumable and parallel modes).
+    #Only rows whose line starts before end are read. Columns come from the
+    #header row; rows must be one per line (no quoted newlines in fields)
+    with open(data, 'rb') as csv_file:
+        positions = csv_column_positions(next(csv.reader([csv_file.readline().decode('utf-8')])))
+        if start:
+            csv_file.seek(start)
+        offset = csv_file.tell()
+        lines = []
+        while end is None or offset < end:
+            line = csv_file.readline()
+            if not line:
+                break
+            offset += len(line)
+            if line.strip():
+                lines.append(line.decode('utf-8'))
+            if len(lines) == chunk_size:
+                yield parse_csv_lines(lines, positions), offset
+                lines = []
+        if lines:
+            yield parse_csv_lines(lines, positions), offset
+
+def parse_csv_lines(lines, positions=(0, 1, 2)):
+    name, email, age = positions
+    return [(row[name], row[email], parse_age(row[age])) for row in csv.reader(lines)]
+
+def read_csv_in_chunks(data, chunk_size=10000):
+    #Yields lists of (name, email, age) tuples so only one chunk of the
+    #file is ever held in memory, whatever the size of the CSV. Columns are
+    #matched by header name and quoted fields may span lines
+    with open(data, newline='') as csv_file:
+        reader = csv.DictReader(csv_file)
+        csv_column_positions(reader.fieldnames or [])
+        chunk = []
+        for row in reader:
+            chunk.append((row['name'], row['email'], parse_age(row['age'])))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def user_id_for(email):
+    #Same email always maps to the same user_id, so re-running a load upserts
+    #the existing rows instead of duplicating them
+    return str(uuid.uuid5(USER_ID_NAMESPACE, email.strip().lower()))
+
+def insert_data(connection, data, chunk_size=10000):
     try:
         #SQL command to insert data to a table
+        rows = 0
+        delta = AgeDelta()
         cursor = connection.cursor()
-        for index, row in pd.read_csv(data).iterrows():
-            user_id = str(uuid.uuid4())
-            insert_query = """
-                INSERT INTO user_data(user_id, name, email, age)
-                VALUES(%s, %s, %s, %s)
-            """
-            values = (user_id, row['name'], row['email'], float(row['age']))
-            cursor.execute(insert_query, values)
+        for chunk in read_csv_in_chunks(data, chunk_size):
+            for name, email, age in chunk:
+                user_id = str(uuid.uuid4())
+                values = (user_id, name, email, age)
+                cursor.execute(INSERT_USER_SQL, values)
+                rows += 1
+            delta.add(age for name, email, age in chunk)
         connection.commit()
         cursor.close()
+        delta.apply(connection)
+        return rows
     except Error as e:
         print(f"Error while inserting data: {e}")
+        return 0
+
+def synthetic_rows(count, seed_value=None):
+    #Deterministic fake users for benchmarks: same count and seed, same rows
+    rng = random.Random(seed_value)
+    for i in range(count):
+        email = f"user{i}@example.com"
+        yield (user_id_for(email), f"User {i}", email, round(rng.uniform(1, 100), 2))
+
+def insert_rows(connection, rows, chunk_size=10000):
+    #Batched upsert of an iterable of (user_id, name, email, age) tuples
+    read_committed(connection)
+    cursor = connection.cursor()
+    count = 0
+    delta = AgeDelta()
+    chunk = []
+    try:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                delta.merge(write_chunk(connection, cursor, upsert_users, chunk))
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            delta.merge(write_chunk(connection, cursor, upsert_users, chunk))
+            count += len(chunk)
+    finally:
+        cursor.close()
+        apply_summary(connection, delta)
+    return count
+
+def report_throughput(label, rows, elapsed):
+    rate = rows / elapsed if elapsed > 0 else float('inf')
+    print(f"{label}: {rows} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+
+def bulk_insert_data(connection, data, chunk_size=10000):
+    #Streams the CSV in chunks and sends each chunk as one batched insert;
+    #mysql-connector rewrites executemany INSERTs into a multi-row VALUES list
+    rows = 0
+    delta = AgeDelta()
+    start = time.perf_counter()
+    try:
+        cursor = connection.cursor()
+        for chunk in read_csv_in_chunks(data, chunk_size):
+            values = [(str(uuid.uuid4()), name, email, age) for name, email, age in chunk]
+            delta.merge(write_chunk(connection, cursor, insert_users, values))
+            rows += len(values)
+        cursor.close()
+    except Error as e:
+        print(f"Error while bulk inserting data: {e}")
+    apply_summary(connection, delta)
+    report_throughput("bulk insert", rows, time.perf_counter() - start)
+    return rows
+
+def load_data_infile(connection, data):
+    #Needs local_infile enabled on the server and a connection opened with
+    #connect_to_prodev(allow_local_infile=True)
+    start = time.perf_counter()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            LOAD DATA LOCAL INFILE %s INTO TABLE user_data
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+            LINES TERMINATED BY '\\n'
+            IGNORE 1 LINES
+            (name, email, age)
+            SET user_id = UUID()
+        """, (data,))
+        rows = cursor.rowcount
+        #The server parsed the file, so the summary is recomputed in SQL
+        rebuild_age_summary(cursor)
+        connection.commit()
+        cursor.close()
+    except Error as e:
+        print(f"Error while loading data: {e}")
+        return 0
+    report_throughput("load data infile", rows, time.perf_counter() - start)
+    return rows
+
+def load_checkpoint(checkpoint, data):
+    try:
+        with open(checkpoint) as checkpoint_file:
+            state = json.load(checkpoint_file)
+    except (OSError, ValueError):
+        return 0, 0
+    if state.get('data') != os.path.abspath(data) or state.get('size') != os.path.getsize(data):
+        print(f"Ignoring checkpoint {checkpoint}: it belongs to a different file")
+        return 0, 0
+    return state['offset'], state['rows']
+
+def save_checkpoint(checkpoint, data, offset, rows):
+    #Write then rename so a crash never leaves a half-written checkpoint
+    state = {
+        'data': os.path.abspath(data),
+        'size': os.path.getsize(data),
+        'offset': offset,
+        'rows': rows,
+    }
+    tmp = checkpoint + '.tmp'
+    with open(tmp, 'w') as checkpoint_file:
+        json.dump(state, checkpoint_file)
+    os.replace(tmp, checkpoint)
+
+def resumable_insert_data(connection, data, chunk_size=10000, checkpoint=None):
+    #Upserts chunk by chunk and records the byte offset after every commit;
+    #a rerun after a crash continues from the last committed chunk
+    checkpoint = checkpoint or data + '.checkpoint'
+    offset, rows = load_checkpoint(checkpoint, data)
+    if offset:
+        print(f"Resuming {data} at byte {offset} ({rows} rows already loaded)")
+    loaded = 0
+    start = time.perf_counter()
+    try:
+        read_committed(connection)
+        cursor = connection.cursor()
+        for chunk, offset in read_csv_chunks_with_offsets(data, chunk_size, start=offset):
+            values = [(user_id_for(email), name, email, age) for name, email, age in chunk]
+            #Applied per chunk, before the checkpoint moves past it
+            write_chunk(connection, cursor, upsert_users, values).apply(connection)
+            loaded += len(values)
+            save_checkpoint(checkpoint, data, offset, rows + loaded)
+        cursor.close()
+        #Load finished: the next run starts from the top again
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+    except Error as e:
+        print(f"Error while upserting data: {e}")
+    report_throughput("resumable insert", loaded, time.perf_counter() - start)
+    return loaded
+
+def split_csv_ranges(data, parts):
+    #Cuts the file body into [start, end) byte ranges aligned to line starts
+    if parts < 1:
+        raise ValueError(f"Cannot split {data} into {parts} ranges")
+    size = os.path.getsize(data)
+    with open(data, 'rb') as csv_file:
+        csv_file.readline()
+        header_end = csv_file.tell()
+        span = max((size - header_end) // parts, 1)
+        bounds = [header_end]
+        for i in range(1, parts):
+            target = header_end + i * span
+            if target >= size:
+                break
+            #Step back one byte so a target that is already a line start stays put
+            csv_file.seek(target - 1)
+            csv_file.readline()
+            if csv_file.tell() > bounds[-1]:
+                bounds.append(csv_file.tell())
+        bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+def load_csv_range(task):
+    #Pool worker: loads one byte range over its own connection and returns
+    #(start, end, rows, elapsed, error). The range's summary delta is applied once, after
+    #its last chunk commits, so workers rarely wait on the summary row
+    data, start, end, chunk_size = task
+    rows = 0
+    began = time.perf_counter()
+    connection = connect_to_prodev()
+    if not connection:
+        return start, end, rows, 0.0, "could not connect"
+    error = None
+    delta = AgeDelta()
+    try:
+        read_committed(connection)
+        cursor = connection.cursor()
+        for chunk, offset in read_csv_chunks_with_offsets(data, chunk_size, start, end):
+            values = [(user_id_for(email), name, email, age) for name, email, age in chunk]
+            delta.merge(write_chunk(connection, cursor, upsert_users, values))
+            rows += len(values)
+        cursor.close()
+    except Error as e:
+        error = str(e)
+    summary_error = apply_summary(connection, delta)
+    connection.close()
+    return start, end, rows, time.perf_counter() - began, error or summary_error
+
+def parallel_insert_data(data, workers=4, chunk_size=10000):
+    #Each worker process holds its own connection, so ingest is no longer
+    #capped by a single session. Rows are upserted with deterministic ids.
+    ranges = split_csv_ranges(data, workers)
+    tasks = [(data, start, end, chunk_size) for start, end in ranges]
+    if not tasks:
+        return 0
+    total = 0
+    failed = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(len(tasks)) as pool:
+        for range_start, range_end, rows, elapsed, error in pool.imap_unordered(load_csv_range, tasks):
+            label = f"  bytes {range_start}-{range_end}"
+            report_throughput(label, rows, elapsed)
+            if error:
+                print(f"{label} failed: {error}")
+                failed.append(error)
+            total += rows
+    report_throughput(f"parallel insert ({len(tasks)} workers)", total, time.perf_counter() - start)
+    if failed:
+        raise RuntimeError(f"parallel insert incomplete: {len(failed)} of {len(tasks)} "
+                           f"ranges failed, {total} rows loaded")
+    return total
+
+def import_columnar(connection, path, chunk_size=65536):
+    #Reverse of export.py: reloads a Parquet or Arrow IPC dump batch by
+    #batch, keeping the exported user_ids so a re-import upserts
+    export = __import__('export')
+    rows = 0
+    delta = AgeDelta()
+    start = time.perf_counter()
+    try:
+        read_committed(connection)
+        cursor = connection.cursor()
+        for values in export.read_columnar(path, chunk_size):
+            delta.merge(write_chunk(connection, cursor, upsert_users, values))
+            rows += len(values)
+        cursor.close()
+    except Error as e:
+        print(f"Error while importing {path}: {e}")
+    apply_summary(connection, delta)
+    report_throughput("columnar import", rows, time.perf_counter() - start)
+    return rows
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Seed the ALX_prodev user_data table")
+    parser.add_argument('data', nargs='?', default='user_data.csv')
+    parser.add_argument('--mode', choices=['row', 'bulk', 'load-data', 'resumable', 'parallel',
+                                           'columnar'],
+                        default='row',
+                        help="row: one INSERT per row, bulk: batched inserts, "
+                             "load-data: LOAD DATA LOCAL INFILE, "
+                             "resumable: idempotent upserts with a checkpoint file, "
+                             "parallel: byte ranges loaded by --workers processes, "
+                             "columnar: a .parquet or .arrow file written by export.py")
+    parser.add_argument('--chunk-size', type=positive_int, default=10000,
+                        help="rows per batch (at least 1)")
+    parser.add_argument('--workers', type=positive_int, default=os.cpu_count() or 4,
+                        help="worker processes for --mode parallel (at least 1)")
+    parser.add_argument('--checkpoint', help="checkpoint path for --mode resumable "
+                                             "(default: <data>.checkpoint)")
+    parser.add_argument('--check-summary', action='store_true',
+                        help="compare the age summary tables with a full scan instead of loading")
+    parser.add_argument('--repair', action='store_true',
+                        help="with --check-summary, rebuild the summary tables on a mismatch")
+    return parser.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
     try:
         conn = connect_db()
         if conn:
             create_database(conn)
             conn.close()
 
-        conn_prodev = connect_to_prodev()
-        if connect_to_prodev:
+        conn_prodev = connect_to_prodev(allow_local_infile=args.mode == 'load-data')
+        if conn_prodev:
             create_table(conn_prodev)
-            insert_data(conn_prodev, 'user_data.csv')
+            if args.check_summary:
+                check_age_summary(conn_prodev, args.repair)
+            elif args.mode == 'bulk':
+                bulk_insert_data(conn_prodev, args.data, args.chunk_size)
+            elif args.mode == 'parallel':
+                parallel_insert_data(args.data, args.workers, args.chunk_size)
+            elif args.mode == 'resumable':
+                resumable_insert_data(conn_prodev, args.data, args.chunk_size, args.checkpoint)
+            elif args.mode == 'columnar':
+                import_columnar(conn_prodev, args.data, args.chunk_size)
+            elif args.mode == 'load-data':
+                load_data_infile(conn_prodev, args.data)
+            else:
+                start = time.perf_counter()
+                rows = insert_data(conn_prodev, args.data, args.chunk_size)
+                report_throughput("row insert", rows, time.perf_counter() - start)
             conn_prodev.close()
     except Error as e:
         print(f"Unexpected error {e}")
\ No newline at end of file
@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+
+import functools
+import threading
+
+from mysql.connector import Error
+
+seed = __import__('seed')
+
+_lock = threading.Lock()
+_counters = {'opened': 0, 'closed': 0, 'leaked': 0}
+
+def _count(name):
+    with _lock:
+        _counters[name] += 1
+
+def stats():
+    #opened/closed/leaked totals plus streams currently holding a connection;
+    #leaked counts streams that were garbage collected without being closed
+    with _lock:
+        counters = dict(_counters)
+    counters['open'] = counters['opened'] - counters['closed']
+    return counters
+
+class Stream:
+    """Iterator over a row generator that owns a pooled connection.
+
+    The connection is checked out on the first next() and returned when the
+    rows run out, on close(), or when a with block exits, so stopping early
+    (islice, break, an exception) never leaves it checked out.
+    """
+    def __init__(self, function, args, kwargs):
+        self._function = function
+        self._args = args
+        self._kwargs = kwargs
+        self._connection = None
+        self._rows = None
+        self._finished = False
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed:
+            raise StopIteration
+        if self._rows is None:
+            self._connection = seed.checkout()
+            _count('opened')
+            self._rows = self._function(self._connection, *self._args, **self._kwargs)
+        try:
+            return next(self._rows)
+        except StopIteration:
+            self._finished = True
+            self.close()
+            raise
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._rows is None:
+            return
+        try:
+            if self._finished:
+                self._rows.close()
+            else:
+                #Stopped mid-result: drop the socket before the generator's
+                #cleanup runs, since closing a cursor with rows still unread
+                #raises "Unread result found" on the pure-Python connector.
+                #Whatever that cleanup raises about the dead socket is moot
+                seed.discard_connection(self._connection)
+                try:
+                    self._rows.close()
+                except Error:
+                    pass
+        finally:
+            seed.release(self._connection)
+            self._connection = None
+            _count('closed')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        if not self.closed and self._rows is not None:
+            _count('leaked')
+            self.close()
+
+def managed(function):
+    #Decorator for generators whose first argument is a connection: callers
+    #drop that argument and get a Stream that supplies a pooled one
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        return Stream(function, args, kwargs)
+    return wrapper
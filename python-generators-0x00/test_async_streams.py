@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""unit test module for async_streams
+"""
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+try:
+    import aiosqlite
+except ImportError:
+    aiosqlite = None
+
+import async_streams
+
+
+class SqliteConnection:
+    """aiomysql-shaped connection over aiosqlite: close() is synchronous."""
+
+    def __init__(self, db) -> None:
+        self.db = db
+        self.closed = False
+
+    def close(self) -> None:
+        """Marks the socket dropped, as aiomysql's close() does."""
+        self.closed = True
+
+
+class SqlitePool:
+    """Stand-in for an aiomysql pool handing out one aiosqlite connection."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.connection = None
+        self.released = []
+
+    async def acquire(self) -> SqliteConnection:
+        """Opens the connection on first use."""
+        if self.connection is None:
+            self.connection = SqliteConnection(await aiosqlite.connect(self.path))
+        return self.connection
+
+    def release(self, connection: SqliteConnection) -> None:
+        """Records the connection coming back."""
+        self.released.append(connection)
+
+
+def fetch_numbers(size: int):
+    """open_fetch over the numbers table, size rows per chunk."""
+    async def open_fetch(connection):
+        cursor = await connection.db.execute("SELECT n FROM numbers ORDER BY n")
+
+        async def fetch():
+            return [n for (n,) in await cursor.fetchmany(size)]
+        return fetch
+    return open_fetch
+
+
+@unittest.skipIf(aiosqlite is None, "needs aiosqlite")
+class TestPrefetched(unittest.IsolatedAsyncioTestCase):
+    """Tests `_prefetched` and `_pump` against a SQLite table."""
+
+    async def asyncSetUp(self) -> None:
+        """Creates a ten-row table and patches the pool in."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'numbers.db')
+        async with aiosqlite.connect(path) as db:
+            await db.execute("CREATE TABLE numbers (n INTEGER PRIMARY KEY)")
+            await db.executemany("INSERT INTO numbers VALUES (?)",
+                                 [(n,) for n in range(10)])
+            await db.commit()
+        self.pool = SqlitePool(path)
+        patcher = patch.object(async_streams, 'get_pool',
+                               return_value=self.pool)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self) -> None:
+        """Closes the SQLite connection."""
+        if self.pool.connection is not None:
+            await self.pool.connection.db.close()
+
+    async def test_reads_every_chunk(self) -> None:
+        """Tests all chunks arrive in order and the connection is kept."""
+        chunks = [chunk async for chunk in
+                  async_streams._prefetched(fetch_numbers(3), 2)]
+        self.assertEqual(chunks, [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]])
+        self.assertEqual(self.pool.released, [self.pool.connection])
+        self.assertFalse(self.pool.connection.closed)
+
+    async def test_early_aclose_releases(self) -> None:
+        """Tests stopping early cancels the producer and drops the socket."""
+        chunks = async_streams._prefetched(fetch_numbers(2), 2)
+        self.assertEqual(await chunks.__anext__(), [0, 1])
+        await chunks.aclose()
+        self.assertEqual(self.pool.released, [self.pool.connection])
+        self.assertTrue(self.pool.connection.closed)
+        pending = [task for task in asyncio.all_tasks()
+                   if task is not asyncio.current_task()]
+        self.assertEqual(pending, [])
+
+    async def test_fetch_error_raises(self) -> None:
+        """Tests an error in the producer reaches the consumer."""
+        async def open_fetch(connection):
+            cursor = await connection.db.execute("SELECT missing FROM numbers")
+            return cursor.fetchall
+        with self.assertRaises(aiosqlite.OperationalError):
+            async for _ in async_streams._prefetched(open_fetch, 2):
+                pass
+        self.assertEqual(self.pool.released, [self.pool.connection])
+
+    async def test_pump_waits_for_consumer(self) -> None:
+        """Tests `_pump` stops fetching while the queue is full."""
+        connection = await self.pool.acquire()
+        fetch_one = await fetch_numbers(1)(connection)
+        calls = []
+
+        async def counted():
+            calls.append(1)
+            return await fetch_one()
+        queue = asyncio.Queue(maxsize=2)
+        producer = asyncio.ensure_future(async_streams._pump(counted, queue))
+        for _ in range(20):
+            await asyncio.sleep(0)
+        self.assertEqual(queue.qsize(), 2)
+        self.assertEqual(len(calls), 3)
+        drained = []
+        while True:
+            chunk = await queue.get()
+            if chunk is async_streams._DONE:
+                break
+            drained.append(chunk)
+        await producer
+        self.assertEqual(drained, [[n] for n in range(10)])
+
+
+class TestGetPool(unittest.IsolatedAsyncioTestCase):
+    """Tests the shared async pool is created once."""
+
+    async def test_concurrent_callers_share_one_pool(self) -> None:
+        """Tests tasks racing on first use do not each create a pool."""
+        created = []
+
+        async def create_pool(**options):
+            await asyncio.sleep(0)
+            created.append(object())
+            return created[-1]
+        driver = Mock(create_pool=create_pool)
+        seed = async_streams.seed
+        with patch.object(async_streams, 'aiomysql', driver), \
+                patch.object(async_streams, '_pool', None), \
+                patch.object(async_streams, '_pool_lock', asyncio.Lock()), \
+                patch.object(seed, 'server_config', return_value={
+                    'host': 'h', 'port': 3306, 'user': 'u', 'password': 'p'}), \
+                patch.object(seed, 'pool_config', return_value={'size': 5}), \
+                patch.object(seed, 'database_name', return_value='db'):
+            pools = await asyncio.gather(
+                *(async_streams.get_pool() for _ in range(5)))
+        self.assertEqual(len(created), 1)
+        self.assertEqual(pools, created * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
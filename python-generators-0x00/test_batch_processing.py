@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""unit test module for 1-batch_processing
+"""
+import io
+import json
+import unittest
+from unittest.mock import Mock, patch
+
+from parameterized import parameterized
+
+processing = __import__('1-batch_processing')
+
+
+class TestAdaptiveBatchSizer(unittest.TestCase):
+    """Tests how `AdaptiveBatchSizer` resizes fetches."""
+
+    @parameterized.expand([
+        ('growth_capped_at_2x', {}, 100, 0.001, None, 200),
+        ('shrinks_when_slow', {}, 100, 0.1, None, 50),
+        ('max_bytes_cap', {'max_bytes': 1000}, 100, 0.001, 5000, 20),
+        ('clamped_to_minimum', {'minimum': 10}, 100, 10.0, None, 10),
+        ('clamped_to_maximum', {'maximum': 150}, 100, 0.001, None, 150),
+    ])
+    def test_resize(self, _: str, options: dict, rows: int, latency: float,
+                    nbytes: int, expected: int) -> None:
+        """Tests one full fetch moves the size as expected."""
+        sizer = processing.AdaptiveBatchSizer(initial=100, target_latency=0.05,
+                                              **options)
+        sizer.record([()] * rows, latency, nbytes)
+        self.assertEqual(sizer.size, expected)
+
+    @parameterized.expand([
+        ('short_final_batch', 30),
+        ('empty_batch', 0),
+    ])
+    def test_partial_fetch_keeps_size(self, _: str, rows: int) -> None:
+        """Tests a fetch shorter than the size does not resize."""
+        sizer = processing.AdaptiveBatchSizer(initial=100)
+        sizer.record([()] * rows, 0.001)
+        self.assertEqual(sizer.size, 100)
+
+    def test_report(self) -> None:
+        """Tests every fetch is kept and printed."""
+        sizer = processing.AdaptiveBatchSizer(initial=100)
+        sizer.record([()] * 100, 0.05, 4000)
+        sizer.record([()] * 7, 0.01)
+        self.assertEqual([metric[1:] for metric in sizer.metrics],
+                         [(100, 100, 0.05, 4000), (100, 7, 0.01, None)])
+        out = io.StringIO()
+        sizer.report(out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('size=100 rows=100 latency=50.00ms, 4000 bytes', lines[0])
+
+
+class TestStreamUsersInBatches(unittest.TestCase):
+    """Tests `stream_users_in_batches` fetch sizes."""
+
+    def setUp(self) -> None:
+        """Patches the pool and the cursor."""
+        self.cursor = Mock()
+        for target, name, value in (
+                (processing.streams.seed, 'checkout', Mock()),
+                (processing.streams.seed, 'release', Mock()),
+                (processing.queries, 'execute', Mock(return_value=self.cursor))):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_sizer_sets_fetch_sizes(self) -> None:
+        """Tests batch_size is optional and the sizer picks every fetch."""
+        self.cursor.fetchmany.side_effect = [[{}] * 100, [{}] * 30, []]
+        sizer = processing.AdaptiveBatchSizer(initial=100)
+        with processing.stream_users_in_batches(sizer=sizer) as batches:
+            self.assertEqual([len(batch) for batch in batches], [100, 30])
+        self.assertEqual([c.args for c in self.cursor.fetchmany.call_args_list],
+                         [(100,), (200,), (200,)])
+        self.assertEqual(len(sizer.metrics), 3)
+
+    def test_needs_size_or_sizer(self) -> None:
+        """Tests a stream without batch_size or sizer is refused."""
+        with self.assertRaises(ValueError):
+            next(processing.stream_users_in_batches())
+
+
+
+@unittest.skipIf(processing.np is None, "columnar batches need numpy")
+class TestColumnar(unittest.TestCase):
+    """Tests the NumPy column helpers."""
+
+    batch = [('u1', 'Ann', 'ann@example.com', 20.5),
+             ('u2', 'Bob "B"', 'bob@example.com', 40),
+             ('u3', 'Zoë', 'zoe@example.com', 25)]
+
+    def test_to_columns(self) -> None:
+        """Tests a batch is transposed into one array per column."""
+        columns = processing.to_columns(self.batch)
+        self.assertEqual(list(columns), list(processing.COLUMNS))
+        self.assertEqual(columns['name'].tolist(), ['Ann', 'Bob "B"', 'Zoë'])
+        self.assertEqual(columns['age'].dtype, processing.np.float64)
+        self.assertEqual(columns['age'].tolist(), [20.5, 40.0, 25.0])
+
+    @parameterized.expand([
+        (25, ['u2']),
+        (20, ['u1', 'u2', 'u3']),
+        (40, []),
+    ])
+    def test_filter_columns(self, min_age: int, expected: list) -> None:
+        """Tests rows are kept only when age is strictly over min_age."""
+        selected = processing.filter_columns(
+            processing.to_columns(self.batch), min_age)
+        self.assertEqual(selected['user_id'].tolist(), expected)
+        self.assertEqual(len(selected['email']), len(expected))
+
+    def test_encode_columns_matches_json(self) -> None:
+        """Tests batch encoding gives the per-row json.dumps text."""
+        expected = '\n'.join(
+            json.dumps(dict(zip(processing.COLUMNS, row[:3] + (float(row[3]),))),
+                       indent=2)
+            for row in self.batch)
+        self.assertEqual(
+            processing.encode_columns(processing.to_columns(self.batch)),
+            expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
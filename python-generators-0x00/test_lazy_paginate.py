@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""unit test module for 2-lazy_paginate
+"""
+import base64
+import json
+import unittest
+from decimal import Decimal
+from unittest.mock import Mock
+
+from parameterized import parameterized
+
+paginate = __import__('2-lazy_paginate')
+
+
+def make_cursor(payload) -> str:
+    """Encodes a payload the way encode_cursor does."""
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+class TestCursor(unittest.TestCase):
+    """Tests `encode_cursor` and `decode_cursor`."""
+
+    row = {'user_id': 'u-42', 'age': Decimal('31.50'), 'email': 'a@example.com'}
+
+    @parameterized.expand([
+        ('user_id', ['u-42']),
+        ('age', ['31.50', 'u-42']),
+        ('email', ['a@example.com', 'u-42']),
+    ])
+    def test_round_trip(self, key: str, expected: list) -> None:
+        """Tests each keyset column survives a round trip."""
+        cursor = paginate.encode_cursor(key, self.row)
+        self.assertEqual(paginate.decode_cursor(cursor), (key, expected))
+
+    @parameterized.expand([
+        ('not_base64', '%%%'),
+        ('not_json', base64.urlsafe_b64encode(b'{nope').decode()),
+        ('missing_after', make_cursor({'key': 'user_id'})),
+        ('unknown_key', make_cursor({'key': 'name', 'after': ['x', 'u-42']})),
+        ('injected_key', make_cursor({'key': 'age` --', 'after': [1, 'u']})),
+        ('wrong_length', make_cursor({'key': 'age', 'after': ['u-42']})),
+    ])
+    def test_rejects(self, _: str, cursor: str) -> None:
+        """Tests malformed or foreign cursors raise ValueError."""
+        with self.assertRaises(ValueError):
+            paginate.decode_cursor(cursor)
+
+
+class TestSeek(unittest.TestCase):
+    """Tests the SQL `paginate_users_after` runs."""
+
+    def test_compound_key_seek(self) -> None:
+        """Tests a non-unique key seeks on (key, user_id)."""
+        statements = Mock()
+        statements.fetchall.return_value = [
+            {'user_id': 'u-7', 'age': Decimal('40.00'), 'email': 'b@x'}]
+        page = paginate.paginate_users_after(statements, 10, 'age',
+                                             ['31.50', 'u-42'])
+        statements.fetchall.assert_called_once_with(
+            "SELECT * FROM `user_data`"
+            " WHERE ((`age` > %s) OR (`age` = %s AND `user_id` > %s))"
+            " ORDER BY `age`, `user_id` LIMIT %s",
+            ('31.50', '31.50', 'u-42', 10))
+        self.assertEqual(paginate.decode_cursor(page.next_cursor),
+                         ('age', ['40.00', 'u-7']))
+
+    def test_first_page_has_no_seek(self) -> None:
+        """Tests the first page orders by the primary key only."""
+        statements = Mock()
+        statements.fetchall.return_value = []
+        page = paginate.paginate_users_after(statements, 5)
+        statements.fetchall.assert_called_once_with(
+            "SELECT * FROM `user_data` ORDER BY `user_id` LIMIT %s", (5,))
+        self.assertIsNone(page.next_cursor)
+
+    def test_rejects_unknown_key(self) -> None:
+        """Tests ordering by a column outside KEYSET_COLUMNS is refused."""
+        with self.assertRaises(ValueError):
+            paginate.paginate_users_after(Mock(), 10, 'name')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""unit test module for partitioned_scan
+"""
+import random
+import unittest
+import uuid
+from contextlib import contextmanager
+from unittest.mock import patch
+
+from parameterized import parameterized
+
+import partitioned_scan
+
+AgeStats = partitioned_scan.ages.AgeStats
+
+
+def stats_of(values):
+    """Returns an AgeStats fed values one at a time."""
+    stats = AgeStats()
+    for value in values:
+        stats.add(value)
+    return stats
+
+
+class SortedIdsCursor:
+    """Cursor answering key_quantiles' queries from a list of user_ids."""
+
+    def __init__(self, ids) -> None:
+        self.ids = sorted(ids)
+        self.row = None
+        self.statements = []
+
+    def execute(self, sql: str, params=()) -> None:
+        """Runs COUNT(*) or a 'user_id > %s ... LIMIT 1 OFFSET %s' seek."""
+        self.statements.append((sql, params))
+        if 'COUNT(*)' in sql:
+            self.row = (len(self.ids),)
+            return
+        if 'WHERE' in sql:
+            after, _, offset = params
+            ids = [user_id for user_id in self.ids if user_id > after]
+        else:
+            _, offset = params
+            ids = self.ids
+        self.row = (ids[offset],) if offset < len(ids) else None
+
+    def fetchone(self):
+        """Returns the last result row."""
+        return self.row
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+
+class TestKeyRanges(unittest.TestCase):
+    """Tests how the user_id space is split."""
+
+    def test_hex_split(self) -> None:
+        """Tests the default split is even on the leading hex digits."""
+        self.assertEqual(partitioned_scan.key_ranges(4), [
+            (None, '40000000'), ('40000000', '80000000'),
+            ('80000000', 'c0000000'), ('c0000000', None)])
+
+    def test_single_partition(self) -> None:
+        """Tests one partition is the whole table."""
+        self.assertEqual(partitioned_scan.key_ranges(1), [(None, None)])
+
+    def test_given_bounds(self) -> None:
+        """Tests explicit bounds are used as they are."""
+        self.assertEqual(partitioned_scan.key_ranges(3, ['b', 'k']),
+                         [(None, 'b'), ('b', 'k'), ('k', None)])
+
+
+class TestKeyQuantiles(unittest.TestCase):
+    """Tests `key_quantiles` against time-based (version 1) ids."""
+
+    def quantiles(self, ids, partitions: int):
+        """Runs key_quantiles over ids, returning the bounds and cursor."""
+        cursor = SortedIdsCursor(ids)
+        connection = type('Connection', (), {'cursor': lambda self: cursor})()
+
+        @contextmanager
+        def pooled_connection():
+            yield connection
+        with patch.object(partitioned_scan.seed, 'pooled_connection',
+                          pooled_connection):
+            return partitioned_scan.key_quantiles(partitions), cursor
+
+    @parameterized.expand([(2,), (3,), (8,)])
+    def test_equal_row_counts(self, partitions: int) -> None:
+        """Tests uuid1 ids, which the hex split piles together, balance."""
+        # A fast LOAD DATA: consecutive timestamps, so equal leading digits
+        ids = [str(uuid.UUID(fields=(0x12340000 + i, 0x5678, 0x11ed, 0x80, 0, 1)))
+               for i in range(1000)]
+        bounds, cursor = self.quantiles(ids, partitions)
+        ranges = partitioned_scan.key_ranges(partitions, bounds)
+        sizes = [sum(1 for user_id in ids
+                     if (low is None or user_id >= low)
+                     and (high is None or user_id < high))
+                 for low, high in ranges]
+        self.assertEqual(len(ranges), partitions)
+        self.assertEqual(sum(sizes), 1000)
+        self.assertLessEqual(max(sizes) - min(sizes), partitions)
+        self.assertEqual(len(cursor.statements), partitions)
+
+        hex_sizes = [sum(1 for user_id in ids
+                         if (low is None or user_id >= low)
+                         and (high is None or user_id < high))
+                     for low, high in partitioned_scan.key_ranges(partitions)]
+        self.assertEqual(max(hex_sizes), 1000)
+
+    def test_tiny_table(self) -> None:
+        """Tests a table smaller than the partition count gives no bounds."""
+        bounds, _ = self.quantiles(['a', 'b'], 4)
+        self.assertEqual(bounds, [])
+        self.assertEqual(partitioned_scan.key_ranges(4, bounds), [(None, None)])
+
+
+
+class TestMergePartitions(unittest.TestCase):
+    """Tests partial AgeStats reduce to the single-pass result."""
+
+    @parameterized.expand([
+        (0,),
+        (1,),
+        (500,),
+        (999,),
+        (1000,),
+    ])
+    def test_merge_matches_one_pass(self, split: int) -> None:
+        """Tests merging two partitions equals one pass over both."""
+        rng = random.Random(split)
+        values = [rng.uniform(1, 100) for _ in range(1000)]
+        merged = stats_of(values[:split]).merge(stats_of(values[split:]))
+        whole = stats_of(values)
+        self.assertEqual(merged.count, whole.count)
+        self.assertAlmostEqual(merged.mean, whole.mean)
+        self.assertAlmostEqual(merged.variance, whole.variance)
+        self.assertAlmostEqual(merged.total, whole.total)
+        self.assertEqual(merged.minimum, whole.minimum)
+        self.assertEqual(merged.maximum, whole.maximum)
+
+
+if __name__ == '__main__':
+    unittest.main()
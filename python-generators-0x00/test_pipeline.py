@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""unit test module for pipeline
+"""
+import unittest
+from typing import List, Tuple
+from unittest.mock import Mock, patch
+
+from parameterized import parameterized
+
+import pipeline
+import streams
+from pipeline import (map_rows, pipe, rebatch, select, sink, source, where,
+                      window)
+
+
+class TestStages(unittest.TestCase):
+    """Tests the in-Python pipeline stages."""
+
+    @parameterized.expand([
+        (5, 3, 1, [(0, 1, 2), (1, 2, 3), (2, 3, 4)]),
+        (7, 3, 3, [(0, 1, 2), (3, 4, 5)]),
+        (10, 2, 4, [(0, 1), (4, 5), (8, 9)]),
+        (2, 3, 1, []),
+    ])
+    def test_window(self, count: int, size: int, step: int,
+                    expected: List[Tuple]) -> None:
+        """Tests `window` for overlapping, tumbling and gapped steps."""
+        self.assertEqual(list(pipe(range(count)) | window(size, step)),
+                         expected)
+
+    def test_rebatch(self) -> None:
+        """Tests `rebatch` keeps a short final batch."""
+        self.assertEqual(list(pipe(range(5)) | rebatch(2)),
+                         [[0, 1], [2, 3], [4]])
+
+    def test_where_and_select(self) -> None:
+        """Tests Python-side filtering and projection."""
+        rows = [{'name': 'a', 'age': 20}, {'name': 'b', 'age': 40}]
+        result = list(pipe(rows) | where('age', '>', 25) | select('name'))
+        self.assertEqual(result, [{'name': 'b'}])
+
+    def test_where_rejects_operator(self) -> None:
+        """Tests an unknown operator is refused."""
+        with self.assertRaises(ValueError):
+            where('age', 'LIKE', 1)
+
+    def test_sink_counts(self) -> None:
+        """Tests `sink` drains the pipeline and returns the count."""
+        seen = []
+        self.assertEqual(pipe(range(4)) | sink(seen.append), 4)
+        self.assertEqual(seen, [0, 1, 2, 3])
+
+
+class TestSourcePushdown(unittest.TestCase):
+    """Tests which stages `Source` folds into SQL."""
+
+    def test_leading_stages_pushed(self) -> None:
+        """Tests where() then select() both become SQL."""
+        pushed = source() | where('age', '>', 25) | select('name')
+        self.assertIsInstance(pushed, pipeline.Source)
+        self.assertEqual(pushed.where, (('age', '>', 25),))
+        self.assertEqual(pushed.columns, ('name',))
+
+    def test_where_after_select_stays_in_python(self) -> None:
+        """Tests a where() after a projection is not pushed down."""
+        chained = source() | select('name') | where('age', '>', 25)
+        self.assertNotIsInstance(chained, pipeline.Source)
+        self.assertEqual(chained.source.where, ())
+        self.assertIsInstance(chained.stages[0], pipeline.Where)
+
+    def test_callable_where_stays_in_python(self) -> None:
+        """Tests a predicate function is never pushed down."""
+        chained = source() | where(lambda row: True)
+        self.assertIsInstance(chained.stages[0], pipeline.Where)
+
+
+
+class TestClosing(unittest.TestCase):
+    """Tests a pipeline over a `Source` gives its connection back."""
+
+    def setUp(self) -> None:
+        """Patches the pool and an endless cursor in."""
+        cursor = Mock()
+        cursor.fetchmany.side_effect = lambda size: [{'age': 30}] * size
+        for target, name, value in (
+                (streams.seed, 'checkout', Mock()),
+                (streams.seed, 'discard_connection', Mock()),
+                (streams.seed, 'release', Mock()),
+                (pipeline.queries, 'execute', Mock(return_value=cursor))):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def open_streams(self) -> int:
+        """Streams currently holding a connection."""
+        return streams.stats()['open']
+
+    def test_break_closes_source(self) -> None:
+        """Tests closing the iterator after a break closes the Stream."""
+        before = self.open_streams()
+        rows = iter(source(prefetch=2) | map_rows(lambda row: row['age']))
+        for age in rows:
+            self.assertEqual(self.open_streams(), before + 1)
+            break
+        rows.close()
+        self.assertEqual(self.open_streams(), before)
+
+    def test_with_block_closes_source(self) -> None:
+        """Tests leaving a with block closes every open iteration."""
+        before = self.open_streams()
+        with source(prefetch=2) | where(lambda row: True) as chained:
+            rows = iter(chained)
+            self.assertEqual(next(rows), {'age': 30})
+            self.assertEqual(self.open_streams(), before + 1)
+        self.assertEqual(self.open_streams(), before)
+
+    def test_sink_error_closes_source(self) -> None:
+        """Tests a failing sink still closes the Stream."""
+        before = self.open_streams()
+
+        def fail(row):
+            raise RuntimeError(row)
+
+        with self.assertRaises(RuntimeError):
+            source() | select('age') | sink(fail)
+        self.assertEqual(self.open_streams(), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
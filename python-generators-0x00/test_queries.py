@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""unit test module for queries
+"""
+import unittest
+from unittest.mock import Mock
+
+from parameterized import parameterized
+
+from queries import (
+    StatementCache,
+    build_seek,
+    build_select,
+    build_where,
+    identifier,
+)
+
+
+class TestIdentifier(unittest.TestCase):
+    """Tests the `identifier` check."""
+
+    @parameterized.expand([
+        ("user_data", "`user_data`"),
+        ("_age2", "`_age2`"),
+    ])
+    def test_valid(self, name: str, expected: str) -> None:
+        """Tests valid names are quoted."""
+        self.assertEqual(identifier(name), expected)
+
+    @parameterized.expand([
+        ("user data",),
+        ("age; DROP TABLE user_data",),
+        ("1age",),
+        ("`age`",),
+    ])
+    def test_invalid(self, name: str) -> None:
+        """Tests anything else is refused."""
+        with self.assertRaises(ValueError):
+            identifier(name)
+
+
+class TestBuilders(unittest.TestCase):
+    """Tests the WHERE, seek and SELECT builders."""
+
+    def test_build_where(self) -> None:
+        """Tests conditions become placeholders joined with AND."""
+        self.assertEqual(
+            build_where([('age', '>', 25), ('email', '=', 'a@b')]),
+            (" WHERE `age` > %s AND `email` = %s", (25, 'a@b')),
+        )
+        self.assertEqual(build_where([]), ('', ()))
+
+    def test_build_where_rejects_operator(self) -> None:
+        """Tests unknown operators are refused."""
+        with self.assertRaises(ValueError):
+            build_where([('age', 'LIKE', '%')])
+
+    def test_build_seek_single(self) -> None:
+        """Tests a one-column seek."""
+        self.assertEqual(build_seek(['user_id'], ['abc']),
+                         ("((`user_id` > %s))", ('abc',)))
+
+    def test_build_seek_compound(self) -> None:
+        """Tests a two-column seek expands the row comparison."""
+        self.assertEqual(
+            build_seek(['age', 'user_id'], [30, 'abc']),
+            ("((`age` > %s) OR (`age` = %s AND `user_id` > %s))",
+             (30, 30, 'abc')),
+        )
+
+    def test_build_select_defaults(self) -> None:
+        """Tests the bare SELECT."""
+        self.assertEqual(build_select('user_data'),
+                         ("SELECT * FROM `user_data`", ()))
+
+    def test_build_select_full(self) -> None:
+        """Tests where, seek, order and limit combine in order."""
+        sql, params = build_select(
+            'user_data', ['user_id', 'age'], [('age', '>=', 18)],
+            order_by=['user_id'], limit=10, seek=(['user_id'], ['abc']))
+        self.assertEqual(
+            sql,
+            "SELECT `user_id`, `age` FROM `user_data` WHERE `age` >= %s"
+            " AND ((`user_id` > %s)) ORDER BY `user_id` LIMIT %s")
+        self.assertEqual(params, (18, 'abc', 10))
+
+    def test_build_select_offset(self) -> None:
+        """Tests OFFSET is a parameter too."""
+        sql, params = build_select('user_data', limit=5, offset=20)
+        self.assertTrue(sql.endswith(" LIMIT %s OFFSET %s"))
+        self.assertEqual(params, (5, 20))
+
+    def test_same_shape_same_text(self) -> None:
+        """Tests pages of one shape share their SQL text."""
+        first = build_select('user_data', order_by=['user_id'], limit=10,
+                             seek=(['user_id'], ['a']))
+        second = build_select('user_data', order_by=['user_id'], limit=10,
+                              seek=(['user_id'], ['b']))
+        self.assertEqual(first[0], second[0])
+
+
+class TestStatementCache(unittest.TestCase):
+    """Tests `StatementCache` reuse."""
+
+    def test_reuses_cursor_and_text_object(self) -> None:
+        """Tests equal texts reach the cursor as the same object, which
+        is what mysql-connector checks before re-preparing."""
+        connection = Mock()
+        cache = StatementCache(connection, dictionary=True)
+        for after in ('a', 'b', 'c'):
+            sql, params = build_select('user_data', limit=10,
+                                       seek=(['user_id'], [after]))
+            cache.execute(sql, params)
+        connection.cursor.assert_called_once_with(prepared=True,
+                                                  dictionary=True)
+        cursor = connection.cursor.return_value
+        texts = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertEqual(len(texts), 3)
+        self.assertTrue(all(text is texts[0] for text in texts))
+
+    def test_close(self) -> None:
+        """Tests close releases every cursor."""
+        connection = Mock()
+        cache = StatementCache(connection)
+        cache.execute("SELECT 1")
+        cache.close()
+        connection.cursor.return_value.close.assert_called_once_with()
+        self.assertEqual(cache.cursors, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
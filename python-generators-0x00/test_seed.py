@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""unit test module for seed
+"""
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest.mock import Mock, call, patch
+
+from mysql.connector import Error
+from parameterized import parameterized
+
+import seed
+
+CSV = (
+    "email,age,name\n"
+    "a@example.com,20,Ann\n"
+    "b@example.com,31.5,\"Bee, B\"\n"
+    "c@example.com,42,Cee\n"
+    "d@example.com,57,Dee\n"
+    "e@example.com,63,Eve\n"
+)
+
+
+class CsvTestCase(unittest.TestCase):
+    """Writes CSV to a temporary file for each test."""
+
+    def write_csv(self, text: str = CSV) -> str:
+        """Returns the path of a temporary CSV holding text."""
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', newline='') as csv_file:
+            csv_file.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+
+class TestCsvReaders(CsvTestCase):
+    """Tests the chunked CSV readers."""
+
+    def test_read_csv_in_chunks_maps_header(self) -> None:
+        """Tests columns are taken by header name, not position."""
+        chunks = list(seed.read_csv_in_chunks(self.write_csv(), 2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(chunks[0][1], ('Bee, B', 'b@example.com', 31.5))
+
+    def test_read_csv_in_chunks_quoted_newline(self) -> None:
+        """Tests a quoted field may span lines."""
+        path = self.write_csv('name,email,age\n"Ann\nLee",a@example.com,20\n')
+        self.assertEqual(list(seed.read_csv_in_chunks(path)),
+                         [[('Ann\nLee', 'a@example.com', 20.0)]])
+
+    def test_missing_column(self) -> None:
+        """Tests a header without age is refused by both readers."""
+        path = self.write_csv('name,email\nAnn,a@example.com\n')
+        with self.assertRaises(ValueError):
+            list(seed.read_csv_in_chunks(path))
+        with self.assertRaises(ValueError):
+            list(seed.read_csv_chunks_with_offsets(path))
+
+    def test_offsets_match_in_chunks(self) -> None:
+        """Tests the offset reader yields the same rows, ending at EOF."""
+        path = self.write_csv()
+        chunks = list(seed.read_csv_chunks_with_offsets(path, 2))
+        self.assertEqual([chunk for chunk, offset in chunks],
+                         list(seed.read_csv_in_chunks(path, 2)))
+        self.assertEqual(chunks[-1][1], os.path.getsize(path))
+
+    def test_resume_from_offset(self) -> None:
+        """Tests restarting at a chunk's offset yields exactly the rest."""
+        path = self.write_csv()
+        chunks = list(seed.read_csv_chunks_with_offsets(path, 2))
+        first, offset = chunks[0]
+        rest = [row for chunk, _ in
+                seed.read_csv_chunks_with_offsets(path, 2, start=offset)
+                for row in chunk]
+        everything = [row for chunk, _ in chunks for row in chunk]
+        self.assertEqual(first + rest, everything)
+
+
+class TestCheckpoint(CsvTestCase):
+    """Tests checkpoint files."""
+
+    def test_round_trip(self) -> None:
+        """Tests a saved checkpoint is loaded back for the same file."""
+        path = self.write_csv()
+        checkpoint = path + '.checkpoint'
+        self.addCleanup(os.remove, checkpoint)
+        seed.save_checkpoint(checkpoint, path, 42, 2)
+        self.assertEqual(seed.load_checkpoint(checkpoint, path), (42, 2))
+
+    def test_other_file_ignored(self) -> None:
+        """Tests a checkpoint for a different file is ignored."""
+        path = self.write_csv()
+        other = self.write_csv(CSV + "f@example.com,70,Fay\n")
+        checkpoint = path + '.checkpoint'
+        self.addCleanup(os.remove, checkpoint)
+        seed.save_checkpoint(checkpoint, path, 42, 2)
+        self.assertEqual(seed.load_checkpoint(checkpoint, other), (0, 0))
+
+    def test_missing_checkpoint(self) -> None:
+        """Tests no checkpoint means starting at the top."""
+        path = self.write_csv()
+        self.assertEqual(seed.load_checkpoint(path + '.none', path), (0, 0))
+
+
+class TestSplitCsvRanges(CsvTestCase):
+    """Tests `split_csv_ranges`."""
+
+    def test_ranges_cover_every_row_once(self) -> None:
+        """Tests the ranges are contiguous and read every row once."""
+        path = self.write_csv()
+        everything = [row for chunk in seed.read_csv_in_chunks(path)
+                      for row in chunk]
+        for parts in range(1, 8):
+            ranges = seed.split_csv_ranges(path, parts)
+            self.assertLessEqual(len(ranges), parts)
+            self.assertEqual(ranges[-1][1], os.path.getsize(path))
+            for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(end, start)
+            rows = [row for start, end in ranges
+                    for chunk, _ in seed.read_csv_chunks_with_offsets(
+                        path, 2, start, end)
+                    for row in chunk]
+            self.assertEqual(rows, everything)
+
+    def test_ranges_start_on_lines(self) -> None:
+        """Tests every range starts at the beginning of a line."""
+        path = self.write_csv()
+        with open(path, 'rb') as csv_file:
+            body = csv_file.read()
+        for start, _ in seed.split_csv_ranges(path, 3):
+            self.assertEqual(body[start - 1:start], b'\n')
+
+    def test_zero_parts(self) -> None:
+        """Tests fewer than one part is refused."""
+        with self.assertRaises(ValueError):
+            seed.split_csv_ranges(self.write_csv(), 0)
+
+
+class TestAgeDelta(unittest.TestCase):
+    """Tests the age summary deltas."""
+
+    def test_half_cents_round_like_mysql(self) -> None:
+        """Tests ages round half away from zero, as DECIMAL(5,2) stores them."""
+        self.assertEqual(seed.parse_age('35.125'), Decimal('35.13'))
+        self.assertEqual(seed.parse_age(' 12.345 '), Decimal('12.35'))
+        self.assertEqual(seed.parse_age(20), Decimal('20.00'))
+        self.assertEqual(seed.age_cents('35.125'), 3513)
+        self.assertEqual(seed.age_cents(seed.parse_age('12.345')), 1235)
+
+    def test_reader_and_delta_agree(self) -> None:
+        """Tests the parsed age and its counted cents are the same number."""
+        (row,) = seed.parse_csv_lines(['Ann,a@example.com,12.345\n'])
+        self.assertEqual(row[2], Decimal('12.35'))
+        self.assertEqual(seed.AgeDelta([row[2]]).total, 1235)
+
+    def test_totals_in_cents(self) -> None:
+        """Tests counts, sums and squares are exact cents."""
+        delta = seed.AgeDelta([20.5, 31], [19.99])
+        self.assertEqual(delta.count, 1)
+        self.assertEqual(delta.total, 2050 + 3100 - 1999)
+        self.assertEqual(delta.squares, 2050 ** 2 + 3100 ** 2 - 1999 ** 2)
+        self.assertEqual(delta.changed_buckets(), [(1, -1), (2, 1), (3, 1)])
+
+    def test_merge_and_cancel(self) -> None:
+        """Tests a delta merged with its inverse is empty."""
+        delta = seed.AgeDelta([20, 45]).merge(seed.AgeDelta([], [45, 20]))
+        self.assertFalse(delta)
+        self.assertEqual(delta.changed_buckets(), [])
+
+    def test_record_ages_statements(self) -> None:
+        """Tests one summary statement and one sorted bucket batch."""
+        cursor = Mock()
+        seed.record_ages(cursor, [55, 12, 18], [12])
+        cursor.execute.assert_called_once_with(
+            seed.RECORD_AGE_SUMMARY_SQL,
+            (2, 7300, 5500 ** 2 + 1800 ** 2))
+        cursor.executemany.assert_called_once_with(
+            seed.RECORD_AGE_BUCKET_SQL, [(1, 1), (5, 1)])
+
+    def test_record_nothing(self) -> None:
+        """Tests an empty batch issues no statements."""
+        cursor = Mock()
+        seed.record_ages(cursor, [])
+        cursor.execute.assert_not_called()
+        cursor.executemany.assert_not_called()
+
+    def test_apply_commits_and_resets(self) -> None:
+        """Tests apply writes in its own transaction and empties the delta."""
+        connection = Mock()
+        delta = seed.AgeDelta([30])
+        delta.apply(connection)
+        connection.commit.assert_called_once_with()
+        self.assertFalse(delta)
+
+
+class TestWriters(unittest.TestCase):
+    """Tests the batched writers."""
+
+    def test_upsert_subtracts_replaced(self) -> None:
+        """Tests replaced ages are subtracted and repeated ids collapse."""
+        cursor = Mock()
+        cursor.fetchall.return_value = [('u1', 40)]
+        delta = seed.upsert_users(cursor, [('u1', 'A', 'a@x', 20),
+                                           ('u1', 'A', 'a@x', 25),
+                                           ('u2', 'B', 'b@x', 30)])
+        self.assertEqual(cursor.executemany.call_args_list, [
+            call(seed.UPSERT_USER_SQL, [('u1', 'A', 'a@x', 25)]),
+            call(seed.INSERT_USER_SQL, [('u2', 'B', 'b@x', 30)]),
+        ])
+        self.assertEqual(delta.count, 1)
+        self.assertEqual(delta.total, 2500 + 3000 - 4000)
+
+    @patch('seed.time.sleep')
+    def test_racing_insert_rereads(self, sleep: Mock) -> None:
+        """Tests an id inserted after the read fails the chunk and is re-read."""
+        connection, cursor = Mock(), Mock()
+        cursor.fetchall.side_effect = [[], [('u1', 40)]]
+        cursor.executemany.side_effect = [Error("duplicate", errno=1062), None]
+        delta = seed.write_chunk(connection, cursor, seed.upsert_users,
+                                 [('u1', 'A', 'a@x', 25)])
+        connection.rollback.assert_called_once_with()
+        self.assertEqual(cursor.executemany.call_args_list, [
+            call(seed.INSERT_USER_SQL, [('u1', 'A', 'a@x', 25)]),
+            call(seed.UPSERT_USER_SQL, [('u1', 'A', 'a@x', 25)]),
+        ])
+        self.assertEqual(delta.count, 0)
+        self.assertEqual(delta.total, 2500 - 4000)
+
+    @patch('seed.time.sleep')
+    def test_write_chunk_retries_deadlock(self, sleep: Mock) -> None:
+        """Tests a deadlock is rolled back and the chunk written again."""
+        connection = Mock()
+        connection.commit.side_effect = [Error("deadlock", errno=1213), None]
+        write = Mock(return_value=seed.AgeDelta([30]))
+        delta = seed.write_chunk(connection, Mock(), write, ['row'])
+        self.assertEqual(write.call_count, 2)
+        connection.rollback.assert_called_once_with()
+        self.assertEqual(delta.count, 1)
+
+    def test_write_chunk_raises_other_errors(self) -> None:
+        """Tests errors other than lock conflicts are not retried."""
+        connection = Mock()
+        write = Mock(side_effect=Error("syntax", errno=1064))
+        with self.assertRaises(Error):
+            seed.write_chunk(connection, Mock(), write, ['row'])
+        self.assertEqual(write.call_count, 1)
+        connection.rollback.assert_called_once_with()
+
+
+class TestParseArgs(unittest.TestCase):
+    """Tests the command line options."""
+
+    @parameterized.expand([('0',), ('-5',)])
+    def test_chunk_size_must_be_positive(self, value: str) -> None:
+        """Tests --chunk-size below 1 is refused."""
+        argv = ['seed.py', '--chunk-size', value]
+        with patch('sys.argv', argv), patch('sys.stderr'), \
+                self.assertRaises(SystemExit):
+            seed.parse_args()
+
+    def test_chunk_size(self) -> None:
+        """Tests a positive --chunk-size is kept."""
+        with patch('sys.argv', ['seed.py', '--chunk-size', '500']):
+            self.assertEqual(seed.parse_args().chunk_size, 500)
+
+
+class TestCheckout(unittest.TestCase):
+    """Tests pooled connection checkout and release."""
+
+    @patch('seed.get_pool')
+    def test_checkout_ends_stale_transaction(self, get_pool: Mock) -> None:
+        """Tests each checkout pings, then rolls back the last snapshot."""
+        connection = get_pool.return_value.get_connection.return_value
+        self.assertIs(seed.checkout(), connection)
+        connection.ping.assert_called_once()
+        connection.rollback.assert_called_once_with()
+
+    @patch('seed.get_pool')
+    def test_pooled_connection_releases(self, get_pool: Mock) -> None:
+        """Tests the with block rolls back and returns the connection."""
+        connection = get_pool.return_value.get_connection.return_value
+        with seed.pooled_connection():
+            connection.rollback.reset_mock()
+        connection.rollback.assert_called_once_with()
+        connection.close.assert_called_once_with()
+
+    def test_release_after_discard(self) -> None:
+        """Tests a dropped socket is still handed back to the pool."""
+        connection = Mock()
+        connection.rollback.side_effect = Error("not connected")
+        seed.release(connection)
+        connection.close.assert_called_once_with()
+
+
+if __name__ == '__main__':
+    unittest.main()
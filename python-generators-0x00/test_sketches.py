@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""unit test module for sketches
+"""
+import random
+import unittest
+
+from sketches import HyperLogLog, KLLSketch, UserSketches
+
+FRACTIONS = (0.5, 0.95, 0.99)
+
+
+def rank_error(values, fraction, estimate):
+    """Distance between fraction and the true rank of estimate."""
+    below = sum(1 for value in values if value <= estimate)
+    return abs(below / len(values) - fraction)
+
+
+class TestKLLSketch(unittest.TestCase):
+    """Tests `KLLSketch`."""
+
+    def setUp(self) -> None:
+        """Builds a shuffled sample of ages."""
+        rng = random.Random(7)
+        self.values = [round(rng.uniform(1, 100), 2) for _ in range(50000)]
+
+    def test_quantiles_within_rank_error(self) -> None:
+        """Tests p50/p95/p99 land within 2% of their true rank."""
+        sketch = KLLSketch(seed=1)
+        for value in self.values:
+            sketch.add(value)
+        self.assertEqual(sketch.count, len(self.values))
+        for fraction, estimate in zip(FRACTIONS, sketch.quantiles(FRACTIONS)):
+            self.assertLess(rank_error(self.values, fraction, estimate), 0.02)
+
+    def test_memory_is_bounded(self) -> None:
+        """Tests the sketch keeps far fewer items than it has seen."""
+        sketch = KLLSketch(seed=1)
+        for value in self.values:
+            sketch.add(value)
+        self.assertLess(sketch.size, len(self.values) // 20)
+
+    def test_merge_matches_accuracy(self) -> None:
+        """Tests merged partition sketches stay within the same error."""
+        merged = KLLSketch(seed=1)
+        for part in range(4):
+            sketch = KLLSketch(seed=part + 2)
+            for value in self.values[part::4]:
+                sketch.add(value)
+            merged.merge(sketch)
+        self.assertEqual(merged.count, len(self.values))
+        for fraction, estimate in zip(FRACTIONS, merged.quantiles(FRACTIONS)):
+            self.assertLess(rank_error(self.values, fraction, estimate), 0.02)
+
+    def test_small_input_is_exact(self) -> None:
+        """Tests inputs below capacity are answered exactly."""
+        sketch = KLLSketch()
+        for value in range(1, 101):
+            sketch.add(value)
+        self.assertEqual(sketch.quantile(0.5), 50)
+        self.assertEqual(sketch.quantile(1.0), 100)
+
+    def test_empty(self) -> None:
+        """Tests an empty sketch has no quantiles."""
+        self.assertEqual(KLLSketch().quantiles(FRACTIONS), [None] * 3)
+
+
+class TestHyperLogLog(unittest.TestCase):
+    """Tests `HyperLogLog`."""
+
+    def test_small_counts_are_near_exact(self) -> None:
+        """Tests linear counting for small cardinalities."""
+        sketch = HyperLogLog()
+        for i in range(1000):
+            sketch.add(f"user{i}@example.com")
+            sketch.add(f"user{i}@example.com")
+        self.assertLess(abs(sketch.count() - 1000), 10)
+
+    def test_large_count_within_error(self) -> None:
+        """Tests 100k distinct values land within 3%."""
+        sketch = HyperLogLog()
+        for i in range(100000):
+            sketch.add(i)
+        self.assertLess(abs(sketch.count() / 100000 - 1), 0.03)
+
+    def test_merge_is_union(self) -> None:
+        """Tests merging overlapping sketches counts the union."""
+        left = HyperLogLog()
+        right = HyperLogLog()
+        for i in range(30000):
+            left.add(i)
+        for i in range(20000, 50000):
+            right.add(i)
+        self.assertLess(abs(left.merge(right).count() / 50000 - 1), 0.03)
+
+    def test_merge_rejects_other_precision(self) -> None:
+        """Tests sketches of different precision cannot merge."""
+        with self.assertRaises(ValueError):
+            HyperLogLog(12).merge(HyperLogLog(14))
+
+
+class TestUserSketches(unittest.TestCase):
+    """Tests `UserSketches`."""
+
+    def test_report(self) -> None:
+        """Tests emails are normalised and the report keys."""
+        sketches = UserSketches()
+        sketches.add(30, 'A@Example.com ')
+        sketches.add(40, 'a@example.com')
+        report = sketches.report()
+        self.assertEqual(report['rows'], 2)
+        self.assertEqual(report['distinct_emails'], 1)
+        self.assertEqual(set(report), {'rows', 'distinct_emails',
+                                       'p50', 'p95', 'p99'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""unit test module for 4-stream_ages
+"""
+import random
+import statistics
+import unittest
+from contextlib import contextmanager
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from mysql.connector import Error
+
+stream_ages = __import__('4-stream_ages')
+AgeStats = stream_ages.AgeStats
+
+
+def stats_of(values):
+    """Returns an AgeStats fed values one at a time."""
+    stats = AgeStats()
+    for value in values:
+        stats.add(value)
+    return stats
+
+
+class TestAgeStats(unittest.TestCase):
+    """Tests `AgeStats`."""
+
+    def test_add(self) -> None:
+        """Tests the single-pass figures against statistics."""
+        rng = random.Random(1)
+        values = [rng.uniform(1, 100) for _ in range(1000)]
+        stats = stats_of(values)
+        self.assertEqual(stats.count, 1000)
+        self.assertAlmostEqual(stats.mean, statistics.fmean(values))
+        self.assertAlmostEqual(stats.variance, statistics.pvariance(values))
+        self.assertEqual(stats.minimum, min(values))
+        self.assertEqual(stats.maximum, max(values))
+
+    def test_from_aggregates(self) -> None:
+        """Tests SQL aggregates load into the same shape."""
+        values = [10.0, 20.0, 60.0]
+        stats = AgeStats.from_aggregates(
+            3, sum(values), 10, 60, statistics.pvariance(values))
+        self.assertEqual(stats.as_dict(), {
+            'count': 3, 'sum': 90.0, 'mean': 30.0, 'min': 10.0,
+            'max': 60.0, 'variance': statistics.pvariance(values),
+        })
+
+    def test_empty(self) -> None:
+        """Tests an empty result."""
+        self.assertEqual(AgeStats().as_dict(), {'count': 0})
+        self.assertEqual(AgeStats().variance, 0.0)
+
+
+
+class TestAggregateAges(unittest.TestCase):
+    """Tests the summary -> SQL -> streaming fallback of `aggregate_ages`."""
+
+    def setUp(self) -> None:
+        """Patches the pool and query execution."""
+        @contextmanager
+        def pooled_connection():
+            yield Mock()
+        self.execute = Mock()
+        for target, name, value in (
+                (stream_ages.seed, 'pooled_connection', pooled_connection),
+                (stream_ages.queries, 'execute', self.execute)):
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_from_summary(self) -> None:
+        """Tests the cent totals give the same figures as the ages."""
+        ages = [Decimal('10.25'), Decimal('20.50'), Decimal('60.00')]
+        cents = [int(age * 100) for age in ages]
+        self.execute.return_value.fetchone.return_value = (
+            3, sum(cents), sum(cent * cent for cent in cents), ages[0], ages[2])
+        stats = stream_ages.aggregate_ages()
+        floats = [float(age) for age in ages]
+        self.assertEqual(stats.count, 3)
+        self.assertAlmostEqual(stats.mean, statistics.fmean(floats))
+        self.assertAlmostEqual(stats.variance, statistics.pvariance(floats))
+        self.assertEqual((stats.minimum, stats.maximum), (10.25, 60.0))
+        self.assertEqual(self.execute.call_args.args[1],
+                         stream_ages.SUMMARY_AGES_SQL)
+
+    @patch('sys.stderr')
+    def test_falls_back_to_sql(self, stderr: Mock) -> None:
+        """Tests a missing summary falls back to one aggregate query."""
+        sql_cursor = Mock()
+        sql_cursor.fetchone.return_value = (2, 50, 20, 30, 25.0)
+        self.execute.side_effect = [Error("no summary table"), sql_cursor]
+        stats = stream_ages.aggregate_ages()
+        self.assertEqual(stats.as_dict()['mean'], 25.0)
+        self.assertEqual(self.execute.call_args.args[1],
+                         stream_ages.AGGREGATE_AGES_SQL)
+
+    @patch('sys.stderr')
+    def test_falls_back_to_streaming(self, stderr: Mock) -> None:
+        """Tests both SQL paths failing streams the ages instead."""
+        self.execute.side_effect = Error("server gone")
+        with patch.object(stream_ages, 'aggregate_ages_streaming',
+                          return_value=stats_of([5.0])) as streaming:
+            self.assertEqual(stream_ages.aggregate_ages().count, 1)
+        streaming.assert_called_once_with()
+        self.assertEqual(self.execute.call_count, 2)
+
+    def test_no_pushdown_streams(self) -> None:
+        """Tests pushdown=False never queries the aggregates."""
+        with patch.object(stream_ages, 'aggregate_ages_streaming',
+                          return_value=AgeStats()):
+            stream_ages.aggregate_ages(pushdown=False)
+        self.execute.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
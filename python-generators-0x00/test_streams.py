@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""unit test module for streams
+"""
+import unittest
+from itertools import islice
+from unittest.mock import Mock, patch
+
+from mysql.connector import errors
+
+import streams
+
+
+class FakeCursor:
+    """Cursor that, like the pure-Python connector, refuses to close
+    while rows are still unread."""
+
+    def __init__(self, rows: int) -> None:
+        self.remaining = rows
+
+    def fetchone(self):
+        """Returns the next row or None."""
+        if not self.remaining:
+            return None
+        self.remaining -= 1
+        return (self.remaining,)
+
+    def close(self) -> None:
+        """Raises if rows are left on the wire."""
+        if self.remaining:
+            raise errors.InternalError("Unread result found")
+
+
+def fake_rows(connection, rows):
+    """Row generator in the shape streams.managed expects."""
+    cursor = FakeCursor(rows)
+    try:
+        while True:
+            row = cursor.fetchone()
+            if row is None:
+                break
+            yield row
+    finally:
+        cursor.close()
+
+
+class TestStream(unittest.TestCase):
+    """Tests `streams.Stream` connection handling."""
+
+    def setUp(self) -> None:
+        """Patches the pool out of seed."""
+        self.connection = Mock()
+        checkout = patch.object(streams.seed, 'checkout',
+                                return_value=self.connection)
+        discard = patch.object(streams.seed, 'discard_connection')
+        self.checkout = checkout.start()
+        self.discard = discard.start()
+        self.addCleanup(checkout.stop)
+        self.addCleanup(discard.stop)
+
+    def test_exhausted_stream_returns_connection(self) -> None:
+        """A fully read stream hands the connection back unharmed."""
+        with streams.Stream(fake_rows, (3,), {}) as rows:
+            self.assertEqual(len(list(rows)), 3)
+        self.discard.assert_not_called()
+        self.connection.close.assert_called_once_with()
+
+    def test_early_exit_with_unread_rows(self) -> None:
+        """islice over a with block drops the socket without raising."""
+        with streams.Stream(fake_rows, (10,), {}) as rows:
+            self.assertEqual(len(list(islice(rows, 6))), 6)
+        self.discard.assert_called_once_with(self.connection)
+        self.connection.close.assert_called_once_with()
+        self.assertTrue(rows.closed)
+
+    def test_unstarted_stream_never_checks_out(self) -> None:
+        """Closing before the first next() touches no connection."""
+        streams.Stream(fake_rows, (3,), {}).close()
+        self.checkout.assert_not_called()
+
+    def test_stats_balance(self) -> None:
+        """Every opened stream is counted as closed."""
+        before = streams.stats()
+        with streams.Stream(fake_rows, (5,), {}) as rows:
+            next(rows)
+        after = streams.stats()
+        self.assertEqual(after['opened'] - before['opened'], 1)
+        self.assertEqual(after['closed'] - before['closed'], 1)
+        self.assertEqual(after['open'], before['open'])
+
+
+if __name__ == '__main__':
+    unittest.main()